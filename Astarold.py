@@ -1,11 +1,16 @@
-import time
 import tkinter as tk
-from queue import PriorityQueue
 from tkinter import messagebox
+from animator import FrameAnimator
+from gridsearch import Grid, run_search
+from incremental import LPAStar
 
 ROWS = 40
 WIDTH = 800
 GAP = WIDTH // ROWS
+# Replay speeds in cells per frame.
+DEFAULT_SPEED = 2
+MAX_SPEED = 40
+PATH_SPEED = 0.33
 
 class Node:
     def __init__(self, row, col, canvas):
@@ -16,10 +21,10 @@ class Node:
         self.y = row * GAP
         self.rect = canvas.create_rectangle(self.x, self.y, self.x + GAP, self.y + GAP, fill="white", outline="lightblue")
         self.neighbors = []
-        self.previous = None
         self.type = "empty"
         self.circle=None
         self.dot=None
+        self.on_path = False
 
     def make_start(self):
         self.type = "start"
@@ -63,66 +68,19 @@ class Node:
                 self.canvas.after(delay, expand_fill, step + 1)
             else:
                 self.canvas.itemconfig(self.rect, fill="black")
-
-        expand_fill()
-
-    def make_visited(self, next_node=None):
-        if self.type in ("start", "end"):
-            return
-        steps = 5
-        delay = 25
-        expansion_step = GAP // (2 * steps)
-
-        x_center = self.x + GAP // 2
-        y_center = self.y + GAP // 2
-
-        fill_rect = self.canvas.create_rectangle(
-            x_center, y_center, x_center, y_center, fill="lightblue", outline=""
-        )
-
-        def expand_fill(step=0):
-
-            if step < steps:
-                x1 = x_center - step * expansion_step
-                y1 = y_center - step * expansion_step
-                x2 = x_center + step * expansion_step
-                y2 = y_center + step * expansion_step
-
-                self.canvas.coords(fill_rect, x1, y1, x2, y2)
-                self.canvas.after(delay, expand_fill, step + 1)
-            else:
-
                 self.canvas.delete(fill_rect)
-                start_blue_animation()
-
-        def start_blue_animation(step=0):
-
-            if step == 0:
-                self.final_fill = self.canvas.create_rectangle(
-                    x_center, y_center, x_center, y_center, fill="#4e7ecc", outline=""
-                )
-
-            if step < steps:
-                x1 = x_center - step * expansion_step
-                y1 = y_center - step * expansion_step
-                x2 = x_center + step * expansion_step
-                y2 = y_center + step * expansion_step
-
-                self.canvas.coords(self.final_fill, x1, y1, x2, y2)
-                self.canvas.after(delay, start_blue_animation, step + 1)
-            else:
-
-                self.canvas.itemconfig(self.rect, fill="#52bce3")
-                self.canvas.delete(self.final_fill)
-
-                if next_node:
-                    self.canvas.after(delay, next_node.make_visited)
 
         expand_fill()
 
+    def make_visited(self):
+        # Pacing comes from the replay, so this only recolours the cell.
+        if self.type not in ("start", "end"):
+            self.canvas.itemconfig(self.rect, fill="#52bce3")
+
     def make_path(self):
         if self.type in ("start", "end"):
             return
+        self.on_path = True
         colors = ["#FFFACD", "#FFD700", "#FFC107", "#FFA500", "yellow"]
         steps = len(colors)
         delay = 50
@@ -130,10 +88,16 @@ class Node:
         def animate_path(step=0):
             if step < steps:
                 self.canvas.itemconfig(self.rect, fill=colors[step])
-                self.canvas.after(delay, animate_path, step )
+                self.canvas.after(delay, animate_path, step + 1)
 
         animate_path()
 
+    def clear_path(self):
+        if self.on_path:
+            self.on_path = False
+            if self.type == "empty":
+                self.canvas.itemconfig(self.rect, fill="#52bce3")
+
     def reset(self):
         self.canvas.itemconfig(self.rect, fill="white")
         self.type = "empty"
@@ -144,79 +108,49 @@ class Node:
 def make_grid(canvas):
     return [[Node(i, j, canvas) for j in range(ROWS)] for i in range(ROWS)]
 
-def get_neighbors(node, grid):
-    neighbors = []
-    if node.row < ROWS - 1 and grid[node.row + 1][node.col].type != "wall":  # down
-        neighbors.append(grid[node.row + 1][node.col])
-    if node.row > 0 and grid[node.row - 1][node.col].type != "wall":  # up
-        neighbors.append(grid[node.row - 1][node.col])
-    if node.col < ROWS - 1 and grid[node.row][node.col + 1].type != "wall":  # right
-        neighbors.append(grid[node.row][node.col + 1])
-    if node.col > 0 and grid[node.row][node.col - 1].type != "wall":  # left
-        neighbors.append(grid[node.row][node.col - 1])
-    return neighbors
-
-def heuristic(a, b):
-    # Manhattan distance
-    return abs(a.row - b.row) + abs(a.col - b.col)
-
-def reconstruct_path(end, canvas):
-    current = end
-    while current.previous:
-        if current.type not in ("start", "end"):
-            current.make_path()
-        current = current.previous
-        canvas.update()
-        time.sleep(0.05)
-
-def a_star(grid, start, end, canvas):
-    count = 0
-    open_set = PriorityQueue()
-    open_set.put((0, count, start))
-    g_score = {node: float("inf") for row in grid for node in row}
-    f_score = {node: float("inf") for row in grid for node in row}
-
-    g_score[start] = 0
-    f_score[start] = heuristic(start, end)
-
-    open_set_hash = {start}
-
-    while not open_set.empty():
-        current = open_set.get()[2]
-        open_set_hash.remove(current)
-
-        if current == end:
-            reconstruct_path(end, canvas)
-            return True
-
-        for neighbor in get_neighbors(current, grid):
-            temp_g_score = g_score[current] + 1
-
-            if temp_g_score < g_score[neighbor]:
-                neighbor.previous = current
-                g_score[neighbor] = temp_g_score
-                f_score[neighbor] = temp_g_score + heuristic(neighbor, end)
-                if neighbor not in open_set_hash:
-                    count += 1
-                    open_set.put((f_score[neighbor], count, neighbor))
-                    open_set_hash.add(neighbor)
-
-        if current != start:
-            current.make_visited()
-
-        canvas.update()
-        time.sleep(0.02)
-    return False
+def search_grid(grid):
+    walls = [{"row": node.row, "col": node.col} for row in grid for node in row if node.type == "wall"]
+    return Grid.from_walls(ROWS, ROWS, walls)
+
+def sync_planner(planner, grid, start, end):
+    # Keep the search state between runs so a rerun only replans around the
+    # walls drawn since the last one.
+    cells = search_grid(grid)
+    if planner is None:
+        return LPAStar(cells, cells.index({"row": start.row, "col": start.col}),
+                       cells.index({"row": end.row, "col": end.col}))
+    planner.sync(cells.walls)
+    return planner
+
+def a_star(grid, planner):
+    """Runs the search to completion; returns (visited nodes, path nodes) to replay."""
+    for row in grid:
+        for node in row:
+            node.clear_path()
+
+    def node_at(idx):
+        row, col = planner.grid.position(idx)
+        return grid[row][col]
+
+    visited = []
+    path = run_search(planner.steps(), visited.append)
+    return [node_at(idx) for idx in visited], [node_at(idx) for idx in path]
 
 def main():
     win = tk.Tk()
     win.title("A* Pathfinding Algorithm")
     canvas = tk.Canvas(win, width=WIDTH, height=WIDTH)
     canvas.pack()
+    speed_scale = tk.Scale(win, from_=0, to=MAX_SPEED, orient=tk.HORIZONTAL, length=WIDTH,
+                           label="Cells per frame (0 = instant)")
+    speed_scale.set(DEFAULT_SPEED)
+    speed_scale.pack()
+    animator = FrameAnimator(canvas)
 
     grid = make_grid(canvas)
     start = None
     end = None
+    planner = None
     drawing = False
 
     def get_node_at(event):
@@ -247,11 +181,24 @@ def main():
         drawing = False
 
     def on_key(event):
+        nonlocal planner
         if event.char == " " and start and end:
-              found = a_star(grid, start, end, canvas)
-              if not found:
-                # show pop-up message
-                messagebox.showinfo("Pathfinding Result","No path found! The end node is unreachable.")
+            # A rerun while the last replay is still going shows the rest of
+            # it first: the planner only reports cells whose distance changed.
+            animator.cancel(flush=True)
+            planner = sync_planner(planner, grid, start, end)
+            visited, path = a_star(grid, planner)
+            speed = speed_scale.get()
+
+            def show_path():
+                if not path:
+                    # show pop-up message
+                    messagebox.showinfo("Pathfinding Result", "No path found! The end node is unreachable.")
+                    return
+                # Animate from the end back towards the start.
+                animator.play(reversed(path[1:]), Node.make_path, min(speed, PATH_SPEED))
+
+            animator.play(visited, Node.make_visited, speed, show_path)
 
     canvas.bind("<Button-1>", on_mouse_down)
     canvas.bind("<B1-Motion>", on_mouse_move)
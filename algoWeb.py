@@ -1,193 +1,632 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify
 from flask_cors import CORS
-from queue import PriorityQueue
+import base64
+import json
+import os
+from functools import partial
 import random
+import struct
+import threading
+import uuid
 import numpy as np
+from clustering import TOLERANCE, BoundedAssigner, as_array, assign, group_by_label, inertia, kmeans_plus_plus, lloyd, minibatch
+from gridsearch import (Grid, dijkstra, a_star, jps, bidirectional_dijkstra, bidirectional_a_star, dijkstra_steps,
+                        a_star_steps, jps_steps, bidirectional_steps, distance_field, path_from_field, run_search,
+                        solve_batch, solve_groups)
+from hierarchy import HierarchicalMap
+from incremental import LPAStar
+from resultcache import LRUCache, make_cache, map_key, search_key
+from workerpool import JobTimeout, PoolSaturated, WorkerPool
 
 app = Flask(__name__)
 CORS(app)
 
 ROWS = 40
-
-
-class Node:
-    def __init__(self, row, col):
-        self.row = row
-        self.col = col
-        self.neighbors = []
-        self.distance = float("inf")
-        self.g_score = float("inf")
-        self.f_score = float("inf")
-        self.previous = None
-        self.type = "empty"
-
-    def __lt__(self, other):
-        return False
-
-
-def make_grid():
-    grid = []
-    for i in range(ROWS):
-        grid.append([])
-        for j in range(ROWS):
-            node = Node(i, j)
-            grid[i].append(node)
+# Largest grid a single request may ask for (5000x5000). See README for latency figures.
+MAX_GRID_CELLS = 5000 * 5000
+
+# Pathfinding result cache. Point SEARCH_CACHE_PATH at a sqlite file to share
+# it between Gunicorn workers; results larger than CACHE_MAX_VISITED aren't kept.
+search_cache = make_cache(os.environ.get('SEARCH_CACHE_PATH'),
+                          int(os.environ.get('SEARCH_CACHE_SIZE', 256)),
+                          float(os.environ.get('SEARCH_CACHE_TTL', 300)))
+CACHE_MAX_VISITED = 1_000_000
+
+# Uploaded maps for many-query workloads, keyed by content hash. Each map keeps
+# up to MAP_FIELDS distance fields, one per query target.
+map_store = LRUCache(int(os.environ.get('MAP_STORE_SIZE', 32)), float(os.environ.get('MAP_STORE_TTL', 3600)))
+MAP_FIELDS = 16
+# Side of the square clusters in a map's HPA* abstraction.
+HPA_CLUSTER_SIZE = int(os.environ.get('HPA_CLUSTER_SIZE', 16))
+# Wall edits are repaired in the request thread. An edit spanning more clusters
+# than this drops the abstraction instead; the next HPA* query rebuilds it on the pool.
+HPA_EDIT_CLUSTERS = 256
+# Most start/end pairs one /api/paths/batch request may carry.
+MAX_BATCH_PAIRS = 100_000
+# Replanning sessions, one LPA* planner each. Every request to a session
+# restarts its idle clock; sessions idle for SESSION_IDLE seconds, or pushed
+# out by SESSION_LIMIT newer ones, are dropped.
+sessions = LRUCache(int(os.environ.get('SESSION_LIMIT', 64)), float(os.environ.get('SESSION_IDLE', 600)))
+# Session repairs run in the request thread (an LPA* planner can't be shipped
+# to a worker), so sessions are limited to grids of at most this many cells.
+MAX_SESSION_CELLS = int(os.environ.get('SESSION_MAX_CELLS', 1000 * 1000))
+
+# Process pool for the searches and streams, batches, map builds and edits, and
+# K-Means. SEARCH_WORKERS=0 runs jobs in the request thread instead. Up to SEARCH_QUEUE jobs wait for a
+# worker before requests get a 429; jobs running past SEARCH_TIMEOUT get a 504.
+# The default leaves room for the slowest search at MAX_GRID_CELLS, streamed.
+SEARCH_WORKERS = int(os.environ.get('SEARCH_WORKERS', os.cpu_count() or 1))
+SEARCH_QUEUE = int(os.environ.get('SEARCH_QUEUE', 2 * SEARCH_WORKERS))
+SEARCH_TIMEOUT = float(os.environ.get('SEARCH_TIMEOUT', 180))
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def worker_pool():
+    global _pool, _pool_pid
+    with _pool_lock:
+        # Started lazily, and again in any process forked after it (e.g. Gunicorn --preload).
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = WorkerPool(SEARCH_WORKERS, SEARCH_QUEUE, SEARCH_TIMEOUT)
+            _pool_pid = os.getpid()
+    return _pool
+
+
+def run_job(fn, *args):
+    if SEARCH_WORKERS <= 0:
+        return fn(*args)
+    return worker_pool().run(fn, *args)
+
+
+def stream_job(fn, *args):
+    """run_job() for a generator function: iterates over its items as the job yields them."""
+    if SEARCH_WORKERS <= 0:
+        return fn(*args)
+    return worker_pool().stream(fn, *args)
+
+
+def run_jobs(fn, arg_lists):
+    """run_job() for several argument tuples at once, one waiting thread each.
+
+    Returns the results in order. If any job failed, the first error
+    (PoolSaturated and JobTimeout included) is raised once all have finished.
+    """
+    if len(arg_lists) == 1 or SEARCH_WORKERS <= 0:
+        return [run_job(fn, *args) for args in arg_lists]
+    results = [None] * len(arg_lists)
+    errors = []
+
+    def work(i, args):
+        try:
+            results[i] = run_job(fn, *args)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=work, args=(i, args)) for i, args in enumerate(arg_lists)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return results
+
+
+def busy_response():
+    return jsonify({"success": False, "message": "Server busy, retry shortly"}), 429, {"Retry-After": "1"}
+
+
+def grid_dimensions(data):
+    rows = data.get('rows', ROWS)
+    cols = data.get('cols', rows)
+    for value in (rows, cols):
+        if not isinstance(value, int) or isinstance(value, bool) or value <= 0:
+            raise ValueError("rows and cols must be positive integers")
+    if rows * cols > MAX_GRID_CELLS:
+        raise ValueError(f"Grid of {rows}x{cols} exceeds the limit of {MAX_GRID_CELLS} cells")
+    return rows, cols
+
+
+def cell_indices(grid, data, key):
+    """Cell indices for the optional list of positions at data[key]."""
+    cells = data.get(key, [])
+    if not isinstance(cells, list):
+        raise ValueError(f"{key} must be a list of {{row, col}} objects")
+    return [grid.index(cell) for cell in cells]
+
+
+def decode_costs(costs, rows, cols):
+    """Cost grid from a base64 string of row-major bytes or a flat list of integers."""
+    if isinstance(costs, str):
+        costs = np.frombuffer(base64.b64decode(costs, validate=True), dtype=np.uint8)
+    else:
+        costs = np.asarray(costs)
+    if costs.size != rows * cols:
+        raise ValueError(f"costs must have {rows * cols} entries, one per cell")
+    if costs.dtype.kind not in 'iu':
+        raise ValueError("costs must be integers")
+    return costs
+
+
+def apply_terrain(grid, costs, algorithm, diagonal):
+    """Sets costs and diagonal moves on ``grid``; only WEIGHTED_SEARCHES accept them."""
+    if (costs is not None or diagonal) and algorithm not in WEIGHTED_SEARCHES:
+        raise ValueError("Cell costs and diagonal moves are only supported by dijkstra and astar")
+    if costs is not None:
+        grid.set_costs(costs)
+    grid.diagonal = bool(diagonal)
     return grid
 
 
-def get_neighbors(node, grid):
-    neighbors = []
-    if node.row < ROWS - 1 and grid[node.row + 1][node.col].type != "wall":
-        neighbors.append(grid[node.row + 1][node.col])
-    if node.row > 0 and grid[node.row - 1][node.col].type != "wall":
-        neighbors.append(grid[node.row - 1][node.col])
-    if node.col < ROWS - 1 and grid[node.row][node.col + 1].type != "wall":
-        neighbors.append(grid[node.row][node.col + 1])
-    if node.col > 0 and grid[node.row][node.col - 1].type != "wall":
-        neighbors.append(grid[node.row][node.col - 1])
-    return neighbors
-
-
-def heuristic(a, b):
-    return abs(a.row - b.row) + abs(a.col - b.col)
-
-
-def reconstruct_path(end):
-    current = end
-    path = []
-    while current:
-        path.append({"row": current.row, "col": current.col})
-        current = current.previous
-    return path[::-1]
-
-
-def dijkstra_algorithm(grid_data, start_pos, end_pos):
-    grid = make_grid()
-    walls = grid_data.get('walls', [])
-    for wall in walls:
-        if 0 <= wall['row'] < ROWS and 0 <= wall['col'] < ROWS:
-            grid[wall['row']][wall['col']].type = "wall"
-
-    start = grid[start_pos['row']][start_pos['col']]
-    end = grid[end_pos['row']][end_pos['col']]
-    start.type = "start"
-    end.type = "end"
-
-    count = 0
-    open_set = PriorityQueue()
-    start.distance = 0
-    open_set.put((0, count, start))
-    visited_order = []
-
-    while not open_set.empty():
-        current = open_set.get()[2]
-        if current == end:
-            path = reconstruct_path(end)
-            return {"success": True, "path": path, "visited": visited_order, "message": "Path found!"}
-
-        for neighbor in get_neighbors(current, grid):
-            temp = current.distance + 1
-            if temp < neighbor.distance:
-                neighbor.distance = temp
-                neighbor.previous = current
-                count += 1
-                open_set.put((neighbor.distance, count, neighbor))
-
-        if current.type not in ("start", "end"):
-            visited_order.append({"row": current.row, "col": current.col})
-
-    return {"success": False, "path": [], "visited": visited_order, "message": "No path found!"}
-
-
-def a_star_algorithm(grid_data, start_pos, end_pos):
-    grid = make_grid()
-    walls = grid_data.get('walls', [])
-    for wall in walls:
-        if 0 <= wall['row'] < ROWS and 0 <= wall['col'] < ROWS:
-            grid[wall['row']][wall['col']].type = "wall"
-
-    start = grid[start_pos['row']][start_pos['col']]
-    end = grid[end_pos['row']][end_pos['col']]
-    start.type = "start"
-    end.type = "end"
-
-    count = 0
-    open_set = PriorityQueue()
-    start.g_score = 0
-    start.f_score = heuristic(start, end)
-    open_set.put((start.f_score, count, start))
-    open_set_hash = {start}
-    visited_order = []
-
-    while not open_set.empty():
-        current = open_set.get()[2]
-        open_set_hash.remove(current)
-
-        if current == end:
-            path = reconstruct_path(end)
-            return {"success": True, "path": path, "visited": visited_order, "message": "Path found!"}
-
-        for neighbor in get_neighbors(current, grid):
-            temp_g_score = current.g_score + 1
-            if temp_g_score < neighbor.g_score:
-                neighbor.previous = current
-                neighbor.g_score = temp_g_score
-                neighbor.f_score = temp_g_score + heuristic(neighbor, end)
-                if neighbor not in open_set_hash:
-                    count += 1
-                    open_set.put((neighbor.f_score, count, neighbor))
-                    open_set_hash.add(neighbor)
-
-        if current.type not in ("start", "end"):
-            visited_order.append({"row": current.row, "col": current.col})
-
-    return {"success": False, "path": [], "visited": visited_order, "message": "No path found!"}
-
-
-def kmeans_algorithm(points, k, max_iterations):
-    if len(points) < k:
-        return {"success": False, "message": "Not enough points for clustering"}
+def wall_mask(grid_data, rows, cols):
+    """(rows, cols) wall mask from grid.mask or grid.runs; None for a walls list.
+
+    ``mask`` is base64 of the binary format's bit-packed wall mask. ``runs``
+    holds row-major run lengths that alternate open and wall, open first.
+    """
+    given = [key for key in ('walls', 'mask', 'runs') if key in grid_data]
+    if len(given) > 1:
+        raise ValueError("Send walls as only one of walls, mask or runs")
+    if 'mask' in grid_data:
+        if not isinstance(grid_data['mask'], str):
+            raise ValueError("mask must be a base64 string")
+        return unpack_walls(base64.b64decode(grid_data['mask'], validate=True), rows, cols)
+    if 'runs' in grid_data:
+        runs = np.asarray(grid_data['runs'])
+        if runs.ndim != 1 or (runs.size and runs.dtype.kind not in 'iu') or (runs < 0).any():
+            raise ValueError("runs must be a flat list of non-negative integers")
+        runs = runs.astype(np.int64)
+        total = int(runs.sum())
+        if total > rows * cols:
+            raise ValueError(f"runs cover {total} cells but the grid has {rows * cols}")
+        mask = np.zeros(rows * cols, dtype=np.bool_)
+        mask[:total] = np.repeat(np.arange(runs.size) % 2 == 1, runs)
+        return mask.reshape(rows, cols)
+    return None
+
+
+def make_grid(grid_data, rows=ROWS, cols=ROWS, algorithm=None, diagonal=False):
+    if not isinstance(grid_data, dict):
+        raise ValueError("grid must be an object")
+    mask = wall_mask(grid_data, rows, cols)
+    if mask is None:
+        walls = grid_data.get('walls', [])
+        if not isinstance(walls, list):
+            raise ValueError("walls must be a list of {row, col} objects")
+        grid = Grid.from_walls(rows, cols, walls)
+    else:
+        grid = Grid.from_mask(rows, cols, mask)
+    costs = grid_data.get('costs')
+    return apply_terrain(grid, None if costs is None else decode_costs(costs, rows, cols), algorithm, diagonal)
+
+
+# Binary wire format, chosen by Content-Type (requests) and Accept (responses).
+# All fields are little-endian and cells are numbered row * cols + col.
+# Query: magic, rows, cols, start cell, end cell, flags; then the wall mask
+# with one bit per cell (bit i of byte i // 8 is cell i), then, with
+# QUERY_COSTS, one cost byte per cell.
+BINARY = 'application/octet-stream'
+QUERY_HEADER = struct.Struct('<4sIIIII')
+QUERY_MAGIC = b'RJQ1'
+QUERY_DIAGONAL = 1
+QUERY_COSTS = 2
+# Result: magic, found, path length, visited length; then the path and the
+# visited cells as int32 arrays.
+RESULT_HEADER = struct.Struct('<4sIII')
+RESULT_MAGIC = b'RJR1'
+
+
+def wants_binary():
+    return request.accept_mimetypes.best_match(['application/json', BINARY]) == BINARY
+
+
+def unpack_walls(data, rows, cols, offset=0):
+    """Boolean (rows, cols) wall mask from the bit-packed mask at ``offset``."""
+    size = -(-rows * cols // 8)
+    if len(data) < offset + size:
+        raise ValueError(f"Wall mask for {rows}x{cols} needs {size} bytes")
+    bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8, count=size, offset=offset),
+                         count=rows * cols, bitorder='little')
+    return bits.view(np.bool_).reshape(rows, cols)
+
+
+def read_query(data, algorithm):
+    """Parses a binary query; returns (grid, start, end)."""
+    if len(data) < QUERY_HEADER.size:
+        raise ValueError("Binary query is shorter than its header")
+    magic, rows, cols, start, end, flags = QUERY_HEADER.unpack_from(data)
+    if magic != QUERY_MAGIC:
+        raise ValueError("Binary query has an unknown header")
+    rows, cols = grid_dimensions({"rows": rows, "cols": cols})
+    grid = Grid.from_mask(rows, cols, unpack_walls(data, rows, cols, QUERY_HEADER.size))
+    costs = None
+    if flags & QUERY_COSTS:
+        offset = QUERY_HEADER.size + -(-rows * cols // 8)
+        if len(data) < offset + rows * cols:
+            raise ValueError(f"Cost grid for {rows}x{cols} needs {rows * cols} bytes")
+        costs = np.frombuffer(data, dtype=np.uint8, count=rows * cols, offset=offset)
+    apply_terrain(grid, costs, algorithm, flags & QUERY_DIAGONAL)
+    cells = [grid.index({"row": cell // cols, "col": cell % cols}) for cell in (start, end)]
+    return grid, cells[0], cells[1]
+
+
+def pack_result(grid, found, path, visited):
+    return b''.join((RESULT_HEADER.pack(RESULT_MAGIC, int(found), len(path), len(visited)),
+                     grid.flat_cells(path).tobytes(), grid.flat_cells(visited).tobytes()))
+
+
+def format_result(grid, found, path, visited):
+    if found:
+        return {"success": True, "path": grid.cells(path), "visited": grid.cells(visited), "message": "Path found!"}
+    return {"success": False, "path": [], "visited": grid.cells(visited), "message": "No path found!"}
+
+
+# Searches keyed by URL name: collectors for the JSON endpoints and
+# generators for the streaming one.
+SEARCHES = {"dijkstra": dijkstra, "astar": a_star, "jps": jps,
+            "bidijkstra": bidirectional_dijkstra, "biastar": bidirectional_a_star}
+SEARCH_STEPS = {"dijkstra": dijkstra_steps, "astar": a_star_steps, "jps": jps_steps,
+                "bidijkstra": bidirectional_steps, "biastar": partial(bidirectional_steps, guided=True)}
+# Searches that take a cost grid and the 8-connected "diagonal" mode.
+WEIGHTED_SEARCHES = {"dijkstra", "astar"}
+
+
+def cache_result(key, result):
+    # Packed results hold four bytes per path or visited cell.
+    cells = len(result) // 4 if isinstance(result, bytes) else len(result["visited"])
+    if cells <= CACHE_MAX_VISITED:
+        search_cache.set(key, result)
+
+
+def compute_search(algorithm, grid, start, end, packed=False):
+    found, path, visited = SEARCHES[algorithm](grid, start, end)
+    if packed:
+        return pack_result(grid, found, path, visited)
+    return format_result(grid, found, path, visited)
+
+
+def cached_search(algorithm, grid, start, end, packed=False):
+    """Result dict for the search, or the binary result bytes with ``packed``."""
+    key = search_key(grid, start, end, algorithm) + (":packed" if packed else "")
+    result = search_cache.get(key)
+    if result is None:
+        result = run_job(compute_search, algorithm, grid, start, end, packed)
+        cache_result(key, result)
+    return result
+
+
+def search_algorithm(algorithm, grid_data, start_pos, end_pos, rows=ROWS, cols=ROWS, diagonal=False):
+    grid = make_grid(grid_data, rows, cols, algorithm, diagonal)
+    return cached_search(algorithm, grid, grid.index(start_pos), grid.index(end_pos))
+
+
+def dijkstra_algorithm(grid_data, start_pos, end_pos, rows=ROWS, cols=ROWS, diagonal=False):
+    return search_algorithm("dijkstra", grid_data, start_pos, end_pos, rows, cols, diagonal)
+
+
+def a_star_algorithm(grid_data, start_pos, end_pos, rows=ROWS, cols=ROWS, diagonal=False):
+    return search_algorithm("astar", grid_data, start_pos, end_pos, rows, cols, diagonal)
+
+
+def jps_algorithm(grid_data, start_pos, end_pos, rows=ROWS, cols=ROWS, diagonal=False):
+    """Jump Point Search; visited lists the expanded jump points."""
+    return search_algorithm("jps", grid_data, start_pos, end_pos, rows, cols, diagonal)
+
+
+def bidirectional_dijkstra_algorithm(grid_data, start_pos, end_pos, rows=ROWS, cols=ROWS, diagonal=False):
+    """Dijkstra from both ends; visited interleaves the two frontiers."""
+    return search_algorithm("bidijkstra", grid_data, start_pos, end_pos, rows, cols, diagonal)
+
+
+def bidirectional_a_star_algorithm(grid_data, start_pos, end_pos, rows=ROWS, cols=ROWS, diagonal=False):
+    """A* from both ends; visited interleaves the two frontiers."""
+    return search_algorithm("biastar", grid_data, start_pos, end_pos, rows, cols, diagonal)
+
+
+class StoredMap:
+    def __init__(self, grid):
+        self.grid = grid
+        self.fields = LRUCache(MAP_FIELDS, float('inf'))
+        self.lock = threading.Lock()
+        self._hierarchy = None
+
+    def field(self, target):
+        field = self.fields.get(target)
+        if field is None:
+            field = run_job(distance_field, self.grid, target)
+            self.fields.set(target, field)
+        return field
+
+    def hierarchy(self):
+        """The map's HPA* abstraction, built on first use."""
+        if self._hierarchy is None:
+            self._hierarchy = run_job(HierarchicalMap, self.grid, HPA_CLUSTER_SIZE)
+            # A worker sends back its own copy of the grid; keep just the one.
+            self.grid = self._hierarchy.grid
+        return self._hierarchy
 
-    # Initialize centroids randomly
-    centroids = random.sample(points, k)
-    iterations_data = []
+    def edited(self, add, remove):
+        """A copy with the wall edits applied, leaving this map untouched.
 
-    for iteration in range(max_iterations):
-        # Assign points to clusters
-        clusters = [[] for _ in range(k)]
-        for point in points:
-            distances = [np.sqrt((point['x'] - c['x']) ** 2 + (point['y'] - c['y']) ** 2) for c in centroids]
-            cluster_idx = distances.index(min(distances))
-            clusters[cluster_idx].append(point)
-
-        # Update centroids
-        new_centroids = []
-        for i, cluster in enumerate(clusters):
-            if cluster:
-                avg_x = sum(p['x'] for p in cluster) / len(cluster)
-                avg_y = sum(p['y'] for p in cluster) / len(cluster)
-                new_centroids.append({'x': avg_x, 'y': avg_y})
+        A built abstraction is copied, sharing every cluster the edit leaves
+        alone, and repaired rather than rebuilt. Distance fields are not
+        carried over.
+        """
+        edited = StoredMap(None)
+        hierarchy = self._hierarchy
+        if hierarchy is not None and np.unique(hierarchy.cluster[add + remove]).size <= HPA_EDIT_CLUSTERS:
+            edited._hierarchy = hierarchy.copy()
+            edited.grid = edited._hierarchy.grid
+        else:
+            edited.grid = self.grid.copy()
+        for cells, wall in ((add, True), (remove, False)):
+            if not cells:
+                continue
+            if edited._hierarchy is not None:
+                edited._hierarchy.set_walls(cells, wall)
             else:
-                new_centroids.append(centroids[i])
-
-        iterations_data.append({
-            'clusters': clusters,
-            'centroids': new_centroids.copy()
-        })
-
-        # Check for convergence
-        converged = True
-        for i in range(k):
-            if abs(centroids[i]['x'] - new_centroids[i]['x']) > 1 or abs(centroids[i]['y'] - new_centroids[i]['y']) > 1:
-                converged = False
-                break
-
-        centroids = new_centroids
-        if converged:
+                edited.grid.walls[cells] = wall
+        return edited
+
+
+def store_map(grid, targets, hierarchy=False):
+    map_id = map_key(grid)
+    stored = map_store.setdefault(map_id, StoredMap(grid))
+    with stored.lock:
+        for target in targets:
+            stored.field(target)
+        if hierarchy:
+            stored.hierarchy()
+    return map_id
+
+
+def edit_map(stored, add, remove):
+    """Files an edited copy of the map under its content hash; returns that ID.
+
+    Everyone who uploaded the same layout shares one StoredMap, so edits are
+    copy-on-write: the original entry stays as it was, and if the edited
+    layout is already stored that entry is kept and reused.
+    """
+    with stored.lock:
+        edited = stored.edited(add, remove)
+    new_id = map_key(edited.grid)
+    map_store.setdefault(new_id, edited)
+    return new_id
+
+
+def format_path(grid, path):
+    if path:
+        return {"success": True, "path": grid.cells(path), "distance": len(path) - 1, "message": "Path found!"}
+    return {"success": False, "path": [], "message": "No path found!"}
+
+
+def map_path(stored, start, end, algorithm="field"):
+    with stored.lock:
+        if algorithm == "hpa":
+            return format_path(stored.grid, stored.hierarchy().find_path(start, end))
+        return format_path(stored.grid, path_from_field(stored.grid, stored.field(end), start))
+
+
+class PlannerSession:
+    def __init__(self, planner):
+        self.planner = planner
+        self.lock = threading.Lock()
+
+
+def create_session(grid, start, end, algorithm):
+    if algorithm not in ("astar", "dijkstra"):
+        raise ValueError("algorithm must be 'astar' or 'dijkstra'")
+    if grid.rows * grid.cols > MAX_SESSION_CELLS:
+        raise ValueError(f"Sessions are limited to {MAX_SESSION_CELLS} cells")
+    session_id = uuid.uuid4().hex
+    sessions.set(session_id, PlannerSession(LPAStar(grid, start, end, guided=algorithm == "astar")))
+    return session_id
+
+
+def touch_session(session_id):
+    session = sessions.get(session_id)
+    if session is not None:
+        sessions.set(session_id, session)
+    return session
+
+
+def edit_session(session, data):
+    """Applies add/remove lists, or a whole replacement grid; returns cells changed."""
+    planner = session.planner
+    grid = planner.grid
+    if 'grid' in data:
+        return sync_session(session, make_grid(data['grid'], grid.rows, grid.cols).walls)
+    add = cell_indices(grid, data, 'add')
+    remove = cell_indices(grid, data, 'remove')
+    with session.lock:
+        add = [cell for cell in add if not grid.walls[cell]]
+        remove = [cell for cell in remove if grid.walls[cell]]
+        planner.set_walls(add, True)
+        planner.set_walls(remove, False)
+    return len(add) + len(remove)
+
+
+def sync_session(session, walls):
+    """Replaces the session's walls with a full padded bitmap; returns cells changed."""
+    with session.lock:
+        return session.planner.sync(walls)
+
+
+def session_path(session, packed=False):
+    """Repairs the session's search; visited holds only the cells this replan touched."""
+    visited = []
+    with session.lock:
+        path = run_search(session.planner.steps(), visited.append)
+    if packed:
+        return pack_result(session.planner.grid, bool(path), path, visited)
+    result = format_result(session.planner.grid, bool(path), path, visited)
+    result["expanded"] = len(visited)
+    return result
+
+
+# Visited cells per NDJSON line when streaming.
+STREAM_BATCH = 256
+
+
+def search_batches(algorithm, grid, start, end, batch_size):
+    """Yields {"visited": [...]} batches as the search expands them, then the final result."""
+    steps = SEARCH_STEPS[algorithm](grid, start, end)
+    batch = []
+    while True:
+        try:
+            batch.append(next(steps))
+        except StopIteration as stop:
+            path = stop.value
             break
+        if len(batch) >= batch_size:
+            yield {"visited": grid.cells(batch)}
+            batch = []
+    if batch:
+        yield {"visited": grid.cells(batch)}
+    yield {"success": bool(path), "path": grid.cells(path), "message": "Path found!" if path else "No path found!"}
 
-    return {"success": True, "iterations": iterations_data,
-            "message": f"K-Means completed in {len(iterations_data)} iterations"}
+
+def stream_search(messages, key):
+    """Yields NDJSON lines for search_batches() messages and caches the result.
+
+    Once the stream has started, a timeout or worker failure can only be
+    reported in-band, as a final {"success": false} line.
+    """
+    visited = []
+    try:
+        for message in messages:
+            if "visited" in message:
+                # Results too large to cache aren't kept in memory either.
+                if visited is not None:
+                    visited.extend(message["visited"])
+                    if len(visited) > CACHE_MAX_VISITED:
+                        visited = None
+            else:
+                result = message
+            yield json.dumps(message) + "\n"
+    except Exception as e:
+        yield json.dumps({"success": False, "path": [], "message": str(e)}) + "\n"
+        return
+    finally:
+        # A client that hangs up early stops the search straight away.
+        messages.close()
+    if visited is not None:
+        cache_result(key, {**result, "visited": visited})
+
+
+def stream_cached(result, batch_size):
+    visited = result["visited"]
+    for lo in range(0, len(visited), batch_size):
+        yield json.dumps({"visited": visited[lo:lo + batch_size]}) + "\n"
+    yield json.dumps({"success": result["success"], "path": result["path"], "message": result["message"]}) + "\n"
+
+
+# Response layouts for /api/kmeans. "clusters" repeats every point dict per
+# iteration; "labels" and "delta" send the points once plus label arrays.
+KMEANS_ENCODINGS = ("clusters", "labels", "delta")
+# Centroid seeding for /api/kmeans: k-means++ sampling or k distinct random points.
+KMEANS_INITS = ("k-means++", "random")
+# "full" runs Lloyd over every point; "minibatch" updates from random batches.
+KMEANS_MODES = ("full", "minibatch")
+MINIBATCH_SIZE = 1024
+
+
+def encode_labels(labels, previous, encoding):
+    if encoding == "labels" or previous is None:
+        return {'labels': labels.tolist()}
+    changed = np.flatnonzero(labels != previous)
+    return {'delta': {'indices': changed.tolist(), 'labels': labels[changed].tolist()}}
+
+
+def seed_centroids(coords, k, init, rng):
+    if init == "k-means++":
+        return kmeans_plus_plus(coords, k, rng)
+    return coords[rng.choice(len(coords), k, replace=False)]
+
+
+def kmeans_algorithm(points, k, max_iterations, encoding="clusters", init="k-means++", seed=None,
+                     tolerance=TOLERANCE, mode="full", batch_size=MINIBATCH_SIZE, accelerated=False):
+    """Runs K-Means; the same seed, init and points always give the same result.
+
+    ``accelerated`` skips most distance computations with Hamerly's bounds
+    and returns exactly the labels of the plain full mode.
+    """
+    if encoding not in KMEANS_ENCODINGS:
+        raise ValueError(f"Unknown encoding '{encoding}', expected one of {', '.join(KMEANS_ENCODINGS)}")
+    if init not in KMEANS_INITS:
+        raise ValueError(f"Unknown init '{init}', expected one of {', '.join(KMEANS_INITS)}")
+    if not isinstance(tolerance, (int, float)) or isinstance(tolerance, bool) or tolerance < 0:
+        raise ValueError("tolerance must be a non-negative number")
+    if seed is not None and (not isinstance(seed, int) or isinstance(seed, bool) or seed < 0):
+        raise ValueError("seed must be a non-negative integer")
+    if mode not in KMEANS_MODES:
+        raise ValueError(f"Unknown mode '{mode}', expected one of {', '.join(KMEANS_MODES)}")
+    if not isinstance(batch_size, int) or isinstance(batch_size, bool) or batch_size <= 0:
+        raise ValueError("batch_size must be a positive integer")
+    if accelerated and mode != "full":
+        raise ValueError("accelerated only applies to mode 'full'")
+    if not isinstance(k, int) or isinstance(k, bool):
+        raise ValueError("k must be an integer")
+    if not isinstance(max_iterations, int) or isinstance(max_iterations, bool) or max_iterations < 0:
+        raise ValueError("max_iterations must be a non-negative integer")
+    coords = as_array(points)
+    if k <= 0:
+        return {"success": False, "message": "Number of clusters must be positive"}
+    if len(points) < k:
+        return {"success": False, "message": "Not enough points for clustering"}
+
+    if seed is None:
+        seed = random.getrandbits(32)
+    rng = np.random.default_rng(seed)
+    if mode == "minibatch":
+        return minibatch_kmeans(points, coords, k, max_iterations, encoding, init, seed, rng, tolerance, batch_size)
+    centroids = seed_centroids(coords, k, init, rng)
+    iterations_data = []
+    previous = None
+
+    assigner = BoundedAssigner(coords) if accelerated else None
+    for labels, centroids in lloyd(coords, centroids, max_iterations, tolerance, assigner):
+        if encoding == "clusters":
+            iteration = {'clusters': group_by_label(points, labels, k)}
+        else:
+            iteration = encode_labels(labels, previous, encoding)
+            previous = labels
+        iteration['centroids'] = [{'x': x, 'y': y} for x, y in centroids.tolist()]
+        iterations_data.append(iteration)
+
+    result = {"success": True, "iterations": iterations_data, "seed": seed,
+              "message": f"K-Means completed in {len(iterations_data)} iterations"}
+    if encoding != "clusters":
+        result["encoding"] = encoding
+        result["points"] = coords.tolist()
+    return result
+
+
+def minibatch_kmeans(points, coords, k, max_iterations, encoding, init, seed, rng, tolerance, batch_size):
+    """Mini-batch mode of kmeans_algorithm.
+
+    Iterations carry only centroids and an inertia estimate. The final labels
+    come once, from a single full assignment pass, as "clusters" or as a
+    "labels" array, and "inertia" is measured exactly on that pass.
+    """
+    # Seed from a sample too, so start-up cost doesn't grow with the point count.
+    sample = coords[rng.choice(len(coords), min(len(coords), max(3 * batch_size, 3 * k)), replace=False)]
+    centroids = seed_centroids(sample, k, init, rng)
+    iterations_data = []
+    for centroids, estimate in minibatch(coords, centroids, max_iterations, batch_size, rng, tolerance):
+        iterations_data.append({'centroids': [{'x': x, 'y': y} for x, y in centroids.tolist()],
+                                'inertia': estimate})
+    labels = assign(coords, centroids)
+    result = {"success": True, "mode": "minibatch", "iterations": iterations_data, "seed": seed,
+              "inertia": inertia(coords, centroids, labels),
+              "message": f"Mini-batch K-Means completed in {len(iterations_data)} batches"}
+    if encoding == "clusters":
+        result["clusters"] = group_by_label(points, labels, k)
+    else:
+        result["encoding"] = "labels"
+        result["labels"] = labels.tolist()
+    return result
 
 
 @app.route('/')
@@ -195,30 +634,254 @@ def index():
     return render_template('index.html')
 
 
+def pathfinding_response(algorithm):
+    """Runs a search from a JSON or binary query; answers in the format the client accepts."""
+    try:
+        if request.mimetype == BINARY:
+            grid, start, end = read_query(request.get_data(), algorithm)
+        else:
+            data = request.get_json()
+            if not data or 'start' not in data or 'end' not in data:
+                return jsonify({"success": False, "message": "Missing start or end position"}), 400
+            rows, cols = grid_dimensions(data)
+            grid = make_grid(data.get('grid', {}), rows, cols, algorithm, data.get('diagonal', False))
+            start, end = grid.index(data['start']), grid.index(data['end'])
+        if wants_binary():
+            return Response(cached_search(algorithm, grid, start, end, packed=True), mimetype=BINARY)
+        return jsonify(cached_search(algorithm, grid, start, end))
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    except PoolSaturated:
+        return busy_response()
+    except JobTimeout as e:
+        return jsonify({"success": False, "message": str(e)}), 504
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e), "message": "Error running algorithm"}), 500
+
+
 @app.route('/api/dijkstra', methods=['POST'])
 def run_dijkstra():
+    return pathfinding_response("dijkstra")
+
+
+@app.route('/api/astar', methods=['POST'])
+def run_astar():
+    return pathfinding_response("astar")
+
+
+@app.route('/api/jps', methods=['POST'])
+def run_jps():
+    return pathfinding_response("jps")
+
+
+@app.route('/api/bidijkstra', methods=['POST'])
+def run_bidijkstra():
+    return pathfinding_response("bidijkstra")
+
+
+@app.route('/api/biastar', methods=['POST'])
+def run_biastar():
+    return pathfinding_response("biastar")
+
+
+@app.route('/api/<algorithm>/stream', methods=['POST'])
+def run_search_stream(algorithm):
+    if algorithm not in SEARCHES:
+        return jsonify({"success": False, "message": f"Unknown algorithm '{algorithm}'"}), 404
     try:
         data = request.get_json()
         if not data or 'start' not in data or 'end' not in data:
             return jsonify({"success": False, "message": "Missing start or end position"}), 400
-        result = dijkstra_algorithm(data.get('grid', {}), data['start'], data['end'])
-        return jsonify(result)
+        rows, cols = grid_dimensions(data)
+        batch_size = data.get('batch', STREAM_BATCH)
+        if not isinstance(batch_size, int) or isinstance(batch_size, bool) or batch_size <= 0:
+            raise ValueError("batch must be a positive integer")
+        grid = make_grid(data.get('grid', {}), rows, cols, algorithm, data.get('diagonal', False))
+        start, end = grid.index(data['start']), grid.index(data['end'])
+        key = search_key(grid, start, end, algorithm)
+        cached = search_cache.get(key)
+        if cached is not None:
+            lines = stream_cached(cached, batch_size)
+        else:
+            # The worker sends each batch back as soon as it has expanded it.
+            lines = stream_search(stream_job(search_batches, algorithm, grid, start, end, batch_size), key)
+        return Response(lines, mimetype='application/x-ndjson')
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    except PoolSaturated:
+        return busy_response()
+    except JobTimeout as e:
+        return jsonify({"success": False, "message": str(e)}), 504
     except Exception as e:
         return jsonify({"success": False, "error": str(e), "message": "Error running algorithm"}), 500
 
 
-@app.route('/api/astar', methods=['POST'])
-def run_astar():
+@app.route('/api/maps', methods=['POST'])
+def upload_map():
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"success": False, "message": "Missing map"}), 400
+        rows, cols = grid_dimensions(data)
+        grid = make_grid(data.get('grid', {}), rows, cols)
+        targets = cell_indices(grid, data, 'targets')
+        map_id = store_map(grid, targets, bool(data.get('hierarchy')))
+        return jsonify({"success": True, "map_id": map_id, "rows": rows, "cols": cols})
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    except PoolSaturated:
+        return busy_response()
+    except JobTimeout as e:
+        return jsonify({"success": False, "message": str(e)}), 504
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e), "message": "Error storing map"}), 500
+
+
+@app.route('/api/maps/<map_id>/path', methods=['POST'])
+def run_map_path(map_id):
     try:
+        stored = map_store.get(map_id)
+        if stored is None:
+            return jsonify({"success": False, "message": f"Unknown or expired map '{map_id}'"}), 404
         data = request.get_json()
         if not data or 'start' not in data or 'end' not in data:
             return jsonify({"success": False, "message": "Missing start or end position"}), 400
-        result = a_star_algorithm(data.get('grid', {}), data['start'], data['end'])
-        return jsonify(result)
+        algorithm = data.get('algorithm', 'field')
+        if algorithm not in ('field', 'hpa'):
+            raise ValueError("algorithm must be 'field' or 'hpa'")
+        grid = stored.grid
+        return jsonify(map_path(stored, grid.index(data['start']), grid.index(data['end']), algorithm))
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    except PoolSaturated:
+        return busy_response()
+    except JobTimeout as e:
+        return jsonify({"success": False, "message": str(e)}), 504
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e), "message": "Error running algorithm"}), 500
+
+
+@app.route('/api/maps/<map_id>/walls', methods=['POST'])
+def run_map_walls(map_id):
+    try:
+        stored = map_store.get(map_id)
+        if stored is None:
+            return jsonify({"success": False, "message": f"Unknown or expired map '{map_id}'"}), 404
+        data = request.get_json()
+        if not data:
+            return jsonify({"success": False, "message": "Missing wall edits"}), 400
+        grid = stored.grid
+        add = cell_indices(grid, data, 'add')
+        remove = cell_indices(grid, data, 'remove')
+        new_id = edit_map(stored, add, remove)
+        return jsonify({"success": True, "map_id": new_id})
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    except PoolSaturated:
+        return busy_response()
+    except JobTimeout as e:
+        return jsonify({"success": False, "message": str(e)}), 504
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e), "message": "Error editing map"}), 500
+
+
+@app.route('/api/session', methods=['POST'])
+def open_session():
+    try:
+        data = request.get_json()
+        if not data or 'start' not in data or 'end' not in data:
+            return jsonify({"success": False, "message": "Missing start or end position"}), 400
+        rows, cols = grid_dimensions(data)
+        grid = make_grid(data.get('grid', {}), rows, cols)
+        session_id = create_session(grid, grid.index(data['start']), grid.index(data['end']),
+                                    data.get('algorithm', 'astar'))
+        return jsonify({"success": True, "session_id": session_id})
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e), "message": "Error opening session"}), 500
+
+
+def unknown_session(session_id):
+    return jsonify({"success": False, "message": f"Unknown or expired session '{session_id}'"}), 404
+
+
+@app.route('/api/session/<session_id>/walls', methods=['POST'])
+def run_session_walls(session_id):
+    try:
+        session = touch_session(session_id)
+        if session is None:
+            return unknown_session(session_id)
+        if request.mimetype == BINARY:
+            # The body is just the session grid's bit-packed wall mask.
+            grid = session.planner.grid
+            walls = Grid.from_mask(grid.rows, grid.cols, unpack_walls(request.get_data(), grid.rows, grid.cols)).walls
+            return jsonify({"success": True, "changed": sync_session(session, walls)})
+        data = request.get_json()
+        if not data:
+            return jsonify({"success": False, "message": "Missing wall edits"}), 400
+        return jsonify({"success": True, "changed": edit_session(session, data)})
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e), "message": "Error editing session"}), 500
+
+
+@app.route('/api/session/<session_id>/path', methods=['POST'])
+def run_session_path(session_id):
+    try:
+        session = touch_session(session_id)
+        if session is None:
+            return unknown_session(session_id)
+        if wants_binary():
+            return Response(session_path(session, packed=True), mimetype=BINARY)
+        return jsonify(session_path(session))
     except Exception as e:
         return jsonify({"success": False, "error": str(e), "message": "Error running algorithm"}), 500
 
 
+@app.route('/api/session/<session_id>', methods=['DELETE'])
+def close_session(session_id):
+    if sessions.get(session_id) is None:
+        return unknown_session(session_id)
+    sessions.delete(session_id)
+    return jsonify({"success": True})
+
+
+@app.route('/api/paths/batch', methods=['POST'])
+def run_path_batch():
+    try:
+        data = request.get_json()
+        if not data or not isinstance(data.get('pairs'), list):
+            return jsonify({"success": False, "message": "Missing pairs"}), 400
+        if len(data['pairs']) > MAX_BATCH_PAIRS:
+            raise ValueError(f"At most {MAX_BATCH_PAIRS} pairs per batch")
+        rows, cols = grid_dimensions(data)
+        grid = make_grid(data.get('grid', {}), rows, cols)
+        if not all(isinstance(pair, dict) and 'start' in pair and 'end' in pair for pair in data['pairs']):
+            raise ValueError("Every pair needs a start and an end position")
+        pairs = [(grid.index(pair['start']), grid.index(pair['end'])) for pair in data['pairs']]
+        # Parallel batches split across the shared worker pool, one chunk per worker.
+        chunks = max(1, SEARCH_WORKERS) if data.get('parallel') else 1
+        paths, searches = solve_batch(grid, pairs, chunks,
+                                      lambda parts: run_jobs(solve_groups, [(grid, pairs, part) for part in parts]))
+        return jsonify({"success": True, "results": [format_path(grid, path) for path in paths],
+                        "searches": searches})
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    except PoolSaturated:
+        return busy_response()
+    except JobTimeout as e:
+        return jsonify({"success": False, "message": str(e)}), 504
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e), "message": "Error running algorithm"}), 500
+
+
+@app.route('/api/cache/stats')
+def cache_stats():
+    return jsonify(search_cache.stats())
+
+
 @app.route('/api/kmeans', methods=['POST'])
 def run_kmeans():
     try:
@@ -229,9 +892,18 @@ def run_kmeans():
         points = data['points']
         k = data.get('k', 3)
         max_iterations = data.get('max_iterations', 10)
+        encoding = data.get('encoding', 'clusters')
 
-        result = kmeans_algorithm(points, k, max_iterations)
+        result = run_job(kmeans_algorithm, points, k, max_iterations, encoding, data.get('init', 'k-means++'),
+                         data.get('seed'), data.get('tolerance', TOLERANCE), data.get('mode', 'full'),
+                         data.get('batch_size', MINIBATCH_SIZE), bool(data.get('accelerated')))
         return jsonify(result)
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    except PoolSaturated:
+        return busy_response()
+    except JobTimeout as e:
+        return jsonify({"success": False, "message": str(e)}), 504
     except Exception as e:
         return jsonify({"success": False, "error": str(e), "message": "Error running K-Means"}), 500
 
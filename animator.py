@@ -0,0 +1,75 @@
+import time
+from collections import deque
+
+# Frame interval for replays, about 60 fps.
+FRAME_MS = 16
+
+
+class FrameAnimator:
+    """Replays a recorded sequence on a Tk widget, a batch per frame.
+
+    ``speed`` is items per frame; fractions spread one item over several
+    frames and 0 paints everything at once. A frame also stops after
+    ``budget_ms`` so a high speed can't stall the event loop. ``paint``
+    should only reconfigure existing canvas items, so a replay creates none.
+    """
+
+    def __init__(self, widget, interval=FRAME_MS, budget_ms=FRAME_MS / 2):
+        self.widget = widget
+        self.interval = interval
+        self.budget = budget_ms / 1000
+        self._items = deque()
+        self._job = None
+        self._done = None
+
+    @property
+    def running(self):
+        return self._job is not None
+
+    def play(self, items, paint, speed, done=None):
+        """Replaces any running replay; calls ``done`` once every item is painted."""
+        self.cancel()
+        if speed <= 0:
+            for item in items:
+                paint(item)
+            if done is not None:
+                done()
+            return
+        self._items = deque(items)
+        self._paint = paint
+        self._speed = speed
+        self._credit = 0.0
+        self._done = done
+        self._frame()
+
+    def cancel(self, flush=False):
+        """Stops the replay without calling its ``done``.
+
+        With ``flush`` the items not yet shown are painted at once, so the
+        canvas still ends up showing the whole recording.
+        """
+        if self._job is not None:
+            self.widget.after_cancel(self._job)
+            self._job = None
+        if flush:
+            for item in self._items:
+                self._paint(item)
+        self._items = deque()
+        self._done = None
+
+    def _frame(self):
+        self._job = None
+        # Unused credit carries over, but never more than one frame's worth.
+        self._credit = min(self._credit + self._speed, max(self._speed, 1))
+        deadline = time.perf_counter() + self.budget
+        while self._items and self._credit >= 1:
+            self._paint(self._items.popleft())
+            self._credit -= 1
+            if time.perf_counter() >= deadline:
+                break
+        if self._items:
+            self._job = self.widget.after(self.interval, self._frame)
+            return
+        done, self._done = self._done, None
+        if done is not None:
+            done()
@@ -0,0 +1,486 @@
+import argparse
+import time
+from queue import PriorityQueue
+import numpy as np
+from clustering import BoundedAssigner, assign, inertia, kmeans_plus_plus, lloyd, minibatch, update_centroids
+from gridsearch import Grid, run_search, dijkstra, a_star, jps, bidirectional_dijkstra, bidirectional_a_star
+from hierarchy import HierarchicalMap
+from incremental import LPAStar
+
+
+def random_grid(rows, cols, density, seed=0):
+    rng = np.random.default_rng(seed)
+    grid = Grid(rows, cols)
+    interior = grid.walls.reshape(rows + 2, cols + 2)[1:-1, 1:-1]
+    interior[...] = rng.random((rows, cols)) < density
+    return grid
+
+
+def maze_grid(rows, cols, seed=0):
+    """Perfect maze carved by a randomised depth-first search over even cells."""
+    rng = np.random.default_rng(seed)
+    grid = Grid(rows, cols)
+    interior = grid.walls.reshape(rows + 2, cols + 2)[1:-1, 1:-1]
+    interior[...] = True
+    interior[0, 0] = False
+    stack = [(0, 0)]
+    while stack:
+        row, col = stack[-1]
+        options = [(row + dr, col + dc) for dr, dc in ((2, 0), (-2, 0), (0, 2), (0, -2))
+                   if 0 <= row + dr < rows and 0 <= col + dc < cols and interior[row + dr, col + dc]]
+        if not options:
+            stack.pop()
+            continue
+        nrow, ncol = options[rng.integers(len(options))]
+        interior[(row + nrow) // 2, (col + ncol) // 2] = False
+        interior[nrow, ncol] = False
+        stack.append((nrow, ncol))
+    return grid
+
+
+def timed(fn, *args):
+    began = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - began
+
+
+def priority_queue_dijkstra(grid, start, end):
+    # The pre-bucket-queue loop, kept as the baseline for `benchmark.py queue`.
+    walls = grid.walls.tolist()
+    dist = {start: 0}
+    stride = grid.stride
+    count = 0
+    open_set = PriorityQueue()
+    open_set.put((0, count, start))
+    expanded = 0
+    while not open_set.empty():
+        current = open_set.get()[2]
+        if current == end:
+            return expanded
+        for neighbor in (current + stride, current - stride, current + 1, current - 1):
+            if walls[neighbor] and neighbor != end:
+                continue
+            temp = dist[current] + 1
+            if temp < dist.get(neighbor, temp + 1):
+                dist[neighbor] = temp
+                count += 1
+                open_set.put((temp, count, neighbor))
+        expanded += 1
+    return expanded
+
+
+def priority_queue_a_star(grid, start, end):
+    walls = grid.walls.tolist()
+    g_score = {start: 0}
+    stride = grid.stride
+    count = 0
+    open_set = PriorityQueue()
+    open_set.put((grid.heuristic(start, end), count, start))
+    open_set_hash = {start}
+    expanded = 0
+    while not open_set.empty():
+        current = open_set.get()[2]
+        open_set_hash.remove(current)
+        if current == end:
+            return expanded
+        for neighbor in (current + stride, current - stride, current + 1, current - 1):
+            if walls[neighbor] and neighbor != end:
+                continue
+            temp = g_score[current] + 1
+            if temp < g_score.get(neighbor, temp + 1):
+                g_score[neighbor] = temp
+                if neighbor not in open_set_hash:
+                    count += 1
+                    open_set.put((temp + grid.heuristic(neighbor, end), count, neighbor))
+                    open_set_hash.add(neighbor)
+        expanded += 1
+    return expanded
+
+
+def bench_queue(args):
+    print(f"{'size':>11} {'search':>9} {'PriorityQueue ms':>17} {'bucket ms':>10} {'speedup':>8}")
+    for size in args.sizes:
+        grid = random_grid(size, size, args.density)
+        start = grid.index({"row": 0, "col": 0})
+        end = grid.index({"row": size - 1, "col": size - 1})
+        grid.walls[start] = grid.walls[end] = False
+        for name, baseline, core in (("dijkstra", priority_queue_dijkstra, dijkstra),
+                                     ("a*", priority_queue_a_star, a_star)):
+            _, before = timed(baseline, grid, start, end)
+            _, after = timed(core, grid, start, end)
+            print(f"{size:>5}x{size:<5} {name:>9} {before * 1e3:17.1f} {after * 1e3:10.1f} {before / after:7.2f}x")
+
+
+def bench_jps(args):
+    print(f"{'size':>11} {'layout':>7} {'a* ms':>9} {'a* expanded':>12} {'jps ms':>9} {'jps expanded':>13} {'speedup':>8}")
+    for size in args.sizes:
+        # Odd sizes keep the maze's far corner on a carved cell.
+        layouts = (("open", random_grid(size, size, 0.0)), ("random", random_grid(size, size, args.density)),
+                   ("maze", maze_grid(size | 1, size | 1)))
+        for layout, grid in layouts:
+            start = grid.index({"row": 0, "col": 0})
+            end = grid.index({"row": grid.rows - 1, "col": grid.cols - 1})
+            grid.walls[start] = grid.walls[end] = False
+            (_, path, a_visited), a_time = timed(a_star, grid, start, end)
+            (_, jps_path, jps_visited), jps_time = timed(jps, grid, start, end)
+            assert len(path) == len(jps_path)
+            print(f"{size:>5}x{size:<5} {layout:>7} {a_time * 1e3:9.1f} {len(a_visited):12d} "
+                  f"{jps_time * 1e3:9.1f} {len(jps_visited):13d} {a_time / jps_time:7.2f}x")
+
+
+def bench_bidirectional(args):
+    print(f"{'size':>11} {'layout':>7} {'search':>9} {'one-way ms':>11} {'expanded':>9} "
+          f"{'two-way ms':>11} {'expanded':>9}")
+    for size in args.sizes:
+        layouts = (("open", random_grid(size, size, 0.0)), ("random", random_grid(size, size, args.density)),
+                   ("maze", maze_grid(size | 1, size | 1)))
+        for layout, grid in layouts:
+            # Endpoints mid-map, where a one-way wavefront can spread in every direction.
+            # Even columns stay on the maze's carved cells.
+            start = grid.index({"row": size // 2, "col": size // 4 & ~1})
+            end = grid.index({"row": size // 2, "col": 3 * size // 4 & ~1})
+            grid.walls[start] = grid.walls[end] = False
+            for name, one_way, two_way in (("dijkstra", dijkstra, bidirectional_dijkstra),
+                                           ("a*", a_star, bidirectional_a_star)):
+                (_, path, visited), before = timed(one_way, grid, start, end)
+                (_, both_path, both_visited), after = timed(two_way, grid, start, end)
+                assert len(path) == len(both_path)
+                print(f"{size:>5}x{size:<5} {layout:>7} {name:>9} {before * 1e3:11.1f} {len(visited):9d} "
+                      f"{after * 1e3:11.1f} {len(both_visited):9d}")
+
+
+def bench_hpa(args):
+    from algoWeb import StoredMap, edit_map
+    print(f"{'size':>11} {'layout':>7} {'build ms':>9} {'nodes':>7} {'update ms':>10} {'edit ms':>8} "
+          f"{'hpa ms':>8} {'a* ms':>8} {'length':>7}")
+    rng = np.random.default_rng(1)
+    for size in args.sizes:
+        layouts = (("open", random_grid(size, size, 0.0)), ("random", random_grid(size, size, args.density)),
+                   ("maze", maze_grid(size | 1, size | 1)))
+        for layout, grid in layouts:
+            hierarchy, build = timed(HierarchicalMap, grid, args.cluster_size)
+            open_cells = np.flatnonzero(~grid.walls)
+            hpa_time = a_star_time = hpa_length = a_star_length = 0
+            for _ in range(args.queries):
+                start, end = rng.choice(open_cells, 2).tolist()
+                path, elapsed = timed(hierarchy.find_path, start, end)
+                hpa_time += elapsed
+                hpa_length += len(path)
+                (_, path, _), elapsed = timed(a_star, grid, start, end)
+                a_star_time += elapsed
+                a_star_length += len(path)
+            # Toggle one cell and put it back, the cost of a single wall edit.
+            cell = int(rng.choice(open_cells))
+            _, update = timed(hierarchy.set_walls, [cell], True)
+            hierarchy.set_walls([cell], False)
+            # The same edit through the /walls endpoint's path: copy, repair, hash and store.
+            stored = StoredMap(grid)
+            stored._hierarchy = hierarchy
+            _, edit = timed(edit_map, stored, [cell], [])
+            print(f"{size:>5}x{size:<5} {layout:>7} {build * 1e3:9.0f} {hierarchy.node_count():7d} {update * 1e3:10.1f} "
+                  f"{edit * 1e3:8.1f} {hpa_time / args.queries * 1e3:8.1f} {a_star_time / args.queries * 1e3:8.1f} "
+                  f"{hpa_length / max(a_star_length, 1):6.3f}x")
+
+
+def bench_replan(args):
+    print(f"{'size':>11} {'search':>9} {'first ms':>9} {'scratch ms':>11} {'expanded':>9} "
+          f"{'replan ms':>10} {'expanded':>9}")
+    rng = np.random.default_rng(2)
+    for size in args.sizes:
+        grid = random_grid(size, size, args.density)
+        start = grid.index({"row": 0, "col": 0})
+        end = grid.index({"row": size - 1, "col": size - 1})
+        grid.walls[start] = grid.walls[end] = False
+        for name, guided, scratch in (("dijkstra", False, dijkstra), ("a*", True, a_star)):
+            planner = LPAStar(Grid.from_walls(size, size, []), start, end, guided)
+            planner.sync(grid.walls)
+            visited = []
+            path, first = timed(run_search, planner.steps(), visited.append)
+            scratch_time = replan_time = scratch_expanded = replan_expanded = 0
+            for _ in range(args.edits):
+                # Wall off a few cells on the current path, the edit that forces a detour.
+                cells = rng.choice(path[1:-1], min(args.cells, len(path) - 2), replace=False).tolist()
+                planner.set_walls(cells, True)
+                visited = []
+                path, elapsed = timed(run_search, planner.steps(), visited.append)
+                replan_time += elapsed
+                replan_expanded += len(visited)
+                (_, _, scratch_visited), elapsed = timed(scratch, planner.grid, start, end)
+                scratch_time += elapsed
+                scratch_expanded += len(scratch_visited)
+            print(f"{size:>5}x{size:<5} {name:>9} {first * 1e3:9.0f} {scratch_time / args.edits * 1e3:11.1f} "
+                  f"{scratch_expanded // args.edits:9d} {replan_time / args.edits * 1e3:10.1f} "
+                  f"{replan_expanded // args.edits:9d}")
+
+
+def bench_weighted(args):
+    print(f"{'size':>11} {'search':>9} {'terrain':>13} {'ms':>9} {'expanded':>10} {'us/cell':>8} {'overhead':>9}")
+    rng = np.random.default_rng(1)
+    for size in args.sizes:
+        grid = random_grid(size, size, args.density)
+        start = grid.index({"row": 0, "col": 0})
+        end = grid.index({"row": size - 1, "col": size - 1})
+        grid.walls[start] = grid.walls[end] = False
+        open_cells = ~grid.walls.reshape(size + 2, size + 2)[1:-1, 1:-1]
+        flat = open_cells.astype(np.uint8)
+        varied = np.where(open_cells, rng.integers(1, args.max_cost + 1, (size, size)), 0)
+        for name, search in (("dijkstra", dijkstra), ("a*", a_star)):
+            baseline = None
+            for terrain, costs, diagonal in (("unit", None, False), ("costs=1", flat, False),
+                                             (f"costs 1-{args.max_cost}", varied, False),
+                                             ("8-way", None, True), (f"8-way 1-{args.max_cost}", varied, True)):
+                weighted = Grid(size, size)
+                weighted.walls[:] = grid.walls
+                if costs is not None:
+                    weighted.set_costs(costs)
+                weighted.diagonal = diagonal
+                (_, _, visited), elapsed = timed(search, weighted, start, end)
+                per_cell = elapsed / max(len(visited), 1)
+                baseline = baseline or per_cell
+                print(f"{size:>5}x{size:<5} {name:>9} {terrain:>13} {elapsed * 1e3:9.1f} {len(visited):10d} "
+                      f"{per_cell * 1e6:8.2f} {per_cell / baseline:8.2f}x")
+
+
+def bench_wire(args):
+    # algoWeb pulls in Flask, so only this benchmark imports it.
+    import json
+    from algoWeb import QUERY_HEADER, QUERY_MAGIC, format_result, make_grid, pack_result, read_query
+    print(f"{'size':>11} {'format':>7} {'request KB':>11} {'decode ms':>10} {'response KB':>12} {'encode ms':>10}")
+    for size in args.sizes:
+        grid = random_grid(size, size, args.density)
+        start = grid.index({"row": 0, "col": 0})
+        end = grid.index({"row": size - 1, "col": size - 1})
+        grid.walls[start] = grid.walls[end] = False
+        found, path, visited = dijkstra(grid, start, end)
+        mask = grid.walls.reshape(size + 2, size + 2)[1:-1, 1:-1]
+        rows, cols = np.nonzero(mask)
+        walls = [{"row": row, "col": col} for row, col in zip(rows.tolist(), cols.tolist())]
+        body = json.dumps({"rows": size, "cols": size, "start": {"row": 0, "col": 0},
+                           "end": {"row": size - 1, "col": size - 1}, "grid": {"walls": walls}})
+        _, decode = timed(lambda: make_grid(json.loads(body)["grid"], size, size))
+        response, encode = timed(lambda: json.dumps(format_result(grid, found, path, visited)))
+        print(f"{size:>5}x{size:<5} {'json':>7} {len(body) / 1024:11.0f} {decode * 1e3:10.1f} "
+              f"{len(response) / 1024:12.0f} {encode * 1e3:10.1f}")
+        query = QUERY_HEADER.pack(QUERY_MAGIC, size, size, 0, size * size - 1, 0) + \
+            np.packbits(mask, bitorder='little').tobytes()
+        _, decode = timed(read_query, query, "dijkstra")
+        response, encode = timed(pack_result, grid, found, path, visited)
+        print(f"{size:>5}x{size:<5} {'binary':>7} {len(query) / 1024:11.0f} {decode * 1e3:10.1f} "
+              f"{len(response) / 1024:12.0f} {encode * 1e3:10.1f}")
+
+
+def bench_walls(args):
+    import base64
+    import json
+    from algoWeb import make_grid
+    print(f"{'size':>11} {'density':>8} {'encoding':>9} {'request KB':>11} {'decode ms':>10}")
+    for size in args.sizes:
+        for density in args.densities:
+            grid = random_grid(size, size, density)
+            mask = grid.walls.reshape(size + 2, size + 2)[1:-1, 1:-1].ravel()
+            rows, cols = np.divmod(np.flatnonzero(mask), size)
+            edges = np.flatnonzero(np.diff(mask.astype(np.int8), prepend=0, append=0))
+            runs = np.diff(edges, prepend=0)
+            encodings = (("walls", [{"row": row, "col": col} for row, col in zip(rows.tolist(), cols.tolist())]),
+                         ("runs", runs.tolist()),
+                         ("mask", base64.b64encode(np.packbits(mask, bitorder='little')).decode()))
+            for name, value in encodings:
+                body = json.dumps({"rows": size, "cols": size, "grid": {name: value}})
+                decoded, decode = timed(lambda: make_grid(json.loads(body)["grid"], size, size))
+                assert (decoded.walls == grid.walls).all()
+                print(f"{size:>5}x{size:<5} {density:8.2f} {name:>9} {len(body) / 1024:11.0f} {decode * 1e3:10.1f}")
+
+
+def blobs(count, k, seed=0, spread=20.0, extent=600.0):
+    """``count`` points around k random centres on an extent x extent canvas."""
+    rng = np.random.default_rng(seed)
+    centres = rng.random((k, 2)) * extent
+    return centres[rng.integers(k, size=count)] + rng.normal(scale=spread, size=(count, 2))
+
+
+def absolute_lloyd(points, centroids, max_iterations, tolerance=1.0):
+    # The pre-k-means++ stopping rule, kept as the baseline for `benchmark.py kmeans`:
+    # stop once no centroid moves more than ``tolerance`` along either axis.
+    for iteration in range(1, max_iterations + 1):
+        new_centroids = update_centroids(points, assign(points, centroids), centroids)
+        done = np.all(np.abs(new_centroids - centroids) <= tolerance)
+        centroids = new_centroids
+        if done:
+            break
+    return centroids, iteration
+
+
+def bench_kmeans(args):
+    print(f"{'points':>9} {'k':>4} {'seeding':>10} {'stop':>9} {'iterations':>11} {'ms':>9} {'inertia':>9}")
+    for count in args.points:
+        points = blobs(count, args.k)
+        rows = {}
+        for run in range(args.runs):
+            rng = np.random.default_rng(run)
+            began = time.perf_counter()
+            centroids, iterations = absolute_lloyd(points, points[rng.choice(count, args.k, replace=False)],
+                                                   args.max_iterations)
+            rows.setdefault(("random", "abs 1.0"), []).append((iterations, time.perf_counter() - began, centroids))
+            for seeding in ("random", "k-means++"):
+                rng = np.random.default_rng(run)
+                began = time.perf_counter()
+                if seeding == "random":
+                    centroids = points[rng.choice(count, args.k, replace=False)]
+                else:
+                    centroids = kmeans_plus_plus(points, args.k, rng)
+                iterations = 0
+                for _, centroids in lloyd(points, centroids, args.max_iterations):
+                    iterations += 1
+                rows.setdefault((seeding, "relative"), []).append((iterations, time.perf_counter() - began, centroids))
+        best = min(inertia(points, centroids, assign(points, centroids)) for results in rows.values() for _, _, centroids in results)
+        for (seeding, stop), results in rows.items():
+            iterations = np.mean([result[0] for result in results])
+            elapsed = np.mean([result[1] for result in results])
+            quality = np.mean([inertia(points, result[2], assign(points, result[2])) for result in results]) / best
+            print(f"{count:>9} {args.k:>4} {seeding:>10} {stop:>9} {iterations:11.1f} {elapsed * 1e3:9.1f} "
+                  f"{quality:8.3f}x")
+
+
+def bench_minibatch(args):
+    print(f"{'points':>9} {'k':>4} {'mode':>15} {'steps':>6} {'ms':>9} {'ms/step':>8} {'estimate':>9} {'inertia':>9}")
+    for count in args.points:
+        points = blobs(count, args.k)
+        rng = np.random.default_rng(0)
+        began = time.perf_counter()
+        centroids = kmeans_plus_plus(points, args.k, rng)
+        steps = 0
+        for _, centroids in lloyd(points, centroids, args.max_iterations):
+            steps += 1
+        elapsed = time.perf_counter() - began
+        exact = inertia(points, centroids, assign(points, centroids))
+        print(f"{count:>9} {args.k:>4} {'full':>15} {steps:6d} {elapsed * 1e3:9.1f} {elapsed / steps * 1e3:8.2f} "
+              f"{'-':>9} {1:8.3f}x")
+        for batch_size in args.batch_sizes:
+            rng = np.random.default_rng(0)
+            began = time.perf_counter()
+            sample = points[rng.choice(count, min(count, 3 * batch_size), replace=False)]
+            centroids = kmeans_plus_plus(sample, args.k, rng)
+            steps = 0
+            for centroids, estimate in minibatch(points, centroids, args.max_iterations, batch_size, rng):
+                steps += 1
+            elapsed = time.perf_counter() - began
+            measured = inertia(points, centroids, assign(points, centroids))
+            print(f"{count:>9} {args.k:>4} {f'batch {batch_size}':>15} {steps:6d} {elapsed * 1e3:9.1f} "
+                  f"{elapsed / steps * 1e3:8.2f} {estimate / measured:8.3f}x {measured / exact:8.3f}x")
+
+
+def bench_accelerated(args):
+    print(f"{'points':>9} {'k':>4} {'iterations':>11} {'exact ms':>9} {'bounded ms':>11} {'full rows':>10} {'speedup':>8}")
+    for count in args.points:
+        for k in args.ks:
+            points = blobs(count, k)
+            start = kmeans_plus_plus(points, k, np.random.default_rng(0))
+            exact, exact_time = timed(lambda: list(lloyd(points, start, args.max_iterations)))
+            assigner = BoundedAssigner(points)
+            bounded, bounded_time = timed(lambda: list(lloyd(points, start, args.max_iterations, assigner=assigner)))
+            assert len(exact) == len(bounded)
+            assert all((a == b).all() for (a, _), (b, _) in zip(exact, bounded))
+            print(f"{count:>9} {k:>4} {len(exact):11d} {exact_time * 1e3:9.0f} {bounded_time * 1e3:11.0f} "
+                  f"{assigner.rows / (count * len(exact)):9.1%} {exact_time / bounded_time:7.2f}x")
+
+
+def bench_grid(args):
+    print(f"{'size':>11} {'build ms':>9} {'dijkstra ms':>12} {'a* ms':>9} {'expanded':>10} {'json ms':>9}")
+    for size in args.sizes:
+        grid, build = timed(random_grid, size, size, args.density)
+        start = grid.index({"row": 0, "col": 0})
+        end = grid.index({"row": size - 1, "col": size - 1})
+        grid.walls[start] = grid.walls[end] = False
+        (found, path, visited), dij = timed(dijkstra, grid, start, end)
+        _, astar = timed(a_star, grid, start, end)
+        if len(visited) <= args.json_limit:
+            _, encode = timed(grid.cells, visited)
+            encoded = f"{encode * 1e3:9.1f}"
+        else:
+            encoded = f"{'-':>9}"
+        print(f"{size:>5}x{size:<5} {build * 1e3:9.1f} {dij * 1e3:12.1f} {astar * 1e3:9.1f} "
+              f"{len(visited):10d} {encoded}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for the search and clustering cores")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    grid = commands.add_parser("grid", help="latency versus grid size for corner-to-corner searches")
+    grid.add_argument("--sizes", type=int, nargs="+", default=[40, 250, 500, 1000, 2000])
+    grid.add_argument("--density", type=float, default=0.2)
+    grid.add_argument("--json-limit", type=int, default=4_000_000,
+                      help="skip building the JSON cell list above this many visited cells")
+    grid.set_defaults(run=bench_grid)
+
+    queue = commands.add_parser("queue", help="bucket-queue core versus the old queue.PriorityQueue loops")
+    queue.add_argument("--sizes", type=int, nargs="+", default=[40, 250, 1000])
+    queue.add_argument("--density", type=float, default=0.2)
+    queue.set_defaults(run=bench_queue)
+
+    jump = commands.add_parser("jps", help="Jump Point Search versus A* on open, random and maze layouts")
+    jump.add_argument("--sizes", type=int, nargs="+", default=[40, 250, 1000])
+    jump.add_argument("--density", type=float, default=0.2)
+    jump.set_defaults(run=bench_jps)
+
+    both = commands.add_parser("bidirectional", help="bidirectional versus one-way Dijkstra and A*")
+    both.add_argument("--sizes", type=int, nargs="+", default=[250, 1000])
+    both.add_argument("--density", type=float, default=0.2)
+    both.set_defaults(run=bench_bidirectional)
+
+    hpa = commands.add_parser("hpa", help="HPA* build, wall-update and query time versus A*, random start/end pairs")
+    hpa.add_argument("--sizes", type=int, nargs="+", default=[500, 1000, 2000])
+    hpa.add_argument("--density", type=float, default=0.2)
+    hpa.add_argument("--cluster-size", type=int, default=16)
+    hpa.add_argument("--queries", type=int, default=10)
+    hpa.set_defaults(run=bench_hpa)
+
+    replan = commands.add_parser("replan", help="LPA* replanning after wall edits versus searching from scratch")
+    replan.add_argument("--sizes", type=int, nargs="+", default=[250, 1000])
+    replan.add_argument("--density", type=float, default=0.2)
+    replan.add_argument("--edits", type=int, default=10, help="edit batches per size")
+    replan.add_argument("--cells", type=int, default=3, help="path cells walled off per batch")
+    replan.set_defaults(run=bench_replan)
+
+    weighted = commands.add_parser("weighted", help="cost-grid and 8-connected searches versus the unit-cost fast path")
+    weighted.add_argument("--sizes", type=int, nargs="+", default=[250, 1000])
+    weighted.add_argument("--density", type=float, default=0.2)
+    weighted.add_argument("--max-cost", type=int, default=9)
+    weighted.set_defaults(run=bench_weighted)
+
+    wire = commands.add_parser("wire", help="JSON versus binary request decoding and result encoding")
+    wire.add_argument("--sizes", type=int, nargs="+", default=[250, 1000, 2000])
+    wire.add_argument("--density", type=float, default=0.2)
+    wire.set_defaults(run=bench_wire)
+
+    walls = commands.add_parser("walls", help="request size and decode time of the JSON wall encodings")
+    walls.add_argument("--sizes", type=int, nargs="+", default=[1000])
+    walls.add_argument("--densities", type=float, nargs="+", default=[0.05, 0.2, 0.4])
+    walls.set_defaults(run=bench_walls)
+
+    kmeans = commands.add_parser("kmeans", help="k-means++ seeding and relative tolerance versus random seeding")
+    kmeans.add_argument("--points", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    kmeans.add_argument("--k", type=int, default=16)
+    kmeans.add_argument("--max-iterations", type=int, default=300)
+    kmeans.add_argument("--runs", type=int, default=5, help="seeds averaged per row")
+    kmeans.set_defaults(run=bench_kmeans)
+
+    batches = commands.add_parser("minibatch", help="mini-batch K-Means versus full Lloyd iterations")
+    batches.add_argument("--points", type=int, nargs="+", default=[100_000, 1_000_000, 4_000_000])
+    batches.add_argument("--k", type=int, default=16)
+    batches.add_argument("--batch-sizes", type=int, nargs="+", default=[256, 1024, 4096])
+    batches.add_argument("--max-iterations", type=int, default=300)
+    batches.set_defaults(run=bench_minibatch)
+
+    accelerated = commands.add_parser("accelerated", help="Hamerly-bounded K-Means assignment versus the exact one")
+    accelerated.add_argument("--points", type=int, nargs="+", default=[100_000])
+    accelerated.add_argument("--ks", type=int, nargs="+", default=[8, 32, 128, 256])
+    accelerated.add_argument("--max-iterations", type=int, default=100)
+    accelerated.set_defaults(run=bench_accelerated)
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+import numpy as np
+
+# Rows per block in the assignment step; bounds the (rows, k) distance matrix.
+CHUNK_ROWS = 65536
+# Default relative convergence tolerance; see shift_threshold().
+TOLERANCE = 1e-4
+# Mini-batch K-Means stops after this many batches without a better inertia
+# estimate; the estimate averages batches with this weight on the newest.
+MINIBATCH_PATIENCE = 10
+MINIBATCH_SMOOTHING = 0.3
+
+
+def as_array(points):
+    """Converts a list of {"x", "y"} dicts, or of [x, y] pairs, to an (N, 2) float array.
+
+    Raises ValueError for anything else.
+    """
+    if not isinstance(points, (list, tuple)):
+        raise ValueError("points must be a list of {x, y} objects or [x, y] pairs")
+    if points and isinstance(points[0], (list, tuple)):
+        try:
+            coords = np.asarray(points, dtype=np.float64)
+        except TypeError:
+            raise ValueError("Point coordinates must be numbers")
+        if coords.ndim != 2 or coords.shape[1] != 2:
+            raise ValueError("Points given as pairs must all be [x, y]")
+    else:
+        if not all(isinstance(p, dict) and 'x' in p and 'y' in p for p in points):
+            raise ValueError("Points given as objects must all have x and y")
+        n = len(points)
+        try:
+            xs = np.fromiter((p['x'] for p in points), dtype=np.float64, count=n)
+            ys = np.fromiter((p['y'] for p in points), dtype=np.float64, count=n)
+        except TypeError:
+            raise ValueError("Point coordinates must be numbers")
+        coords = np.column_stack((xs, ys))
+    # A null coordinate comes through as NaN.
+    if not np.isfinite(coords).all():
+        raise ValueError("Point coordinates must be finite numbers")
+    return coords
+
+
+def _squared_distances(block, centroids):
+    distances = block[:, 0:1] - centroids[:, 0]
+    distances *= distances
+    dy = block[:, 1:2] - centroids[:, 1]
+    dy *= dy
+    distances += dy
+    return distances
+
+
+def assign(points, centroids):
+    """Returns the index of the nearest centroid for every point."""
+    labels = np.empty(len(points), dtype=np.intp)
+    for lo in range(0, len(points), CHUNK_ROWS):
+        # Squared distances pick the same nearest centroid as Euclidean ones.
+        labels[lo:lo + CHUNK_ROWS] = _squared_distances(points[lo:lo + CHUNK_ROWS], centroids).argmin(axis=1)
+    return labels
+
+
+def _nearest_two(points, centroids):
+    """(labels, nearest distance, second-nearest distance) for every point."""
+    labels = np.empty(len(points), dtype=np.intp)
+    first = np.empty(len(points))
+    second = np.empty(len(points))
+    for lo in range(0, len(points), CHUNK_ROWS):
+        distances = _squared_distances(points[lo:lo + CHUNK_ROWS], centroids)
+        rows = np.arange(len(distances))
+        nearest = distances.argmin(axis=1)
+        labels[lo:lo + CHUNK_ROWS] = nearest
+        first[lo:lo + CHUNK_ROWS] = distances[rows, nearest]
+        distances[rows, nearest] = np.inf
+        second[lo:lo + CHUNK_ROWS] = distances.min(axis=1)
+    return labels, np.sqrt(first), np.sqrt(second)
+
+
+class BoundedAssigner:
+    """Drop-in for assign() across Lloyd iterations, using Hamerly's bounds.
+
+    Each point keeps an upper bound on the distance to its centroid and a
+    lower bound on the distance to every other one. When centroids move,
+    the bounds are loosened by how far they moved. Only points whose bounds
+    overlap get their distances recomputed: first the one to their own
+    centroid, then, if that doesn't settle it, the whole row. A point is
+    kept only when its centroid is strictly closer by a small relative
+    margin, so ties and rounding fall through to the exact computation and
+    the labels always equal assign()'s.
+    """
+
+    # Relative slack on the bounds; far above the rounding they accumulate.
+    MARGIN = 1e-9
+
+    def __init__(self, points):
+        self.points = points
+        self.labels = None
+        self.computed = 0
+        self.rows = 0
+
+    def __call__(self, centroids):
+        if self.labels is None or len(centroids) != len(self.centroids):
+            self.labels, self.upper, self.lower = _nearest_two(self.points, centroids)
+            self.centroids = centroids.copy()
+            self.rows += len(self.points)
+            return self.labels.copy()
+
+        moved = np.sqrt(((centroids - self.centroids) ** 2).sum(axis=1))
+        self.centroids = centroids.copy()
+        labels, upper, lower = self.labels, self.upper, self.lower
+        upper += moved[labels]
+        if len(moved) > 1:
+            order = np.argsort(moved)
+            fastest, runner_up = order[-1], order[-2]
+            lower -= np.where(labels == fastest, moved[runner_up], moved[fastest])
+        # Half the distance to the nearest other centroid also bounds the rest.
+        between = np.sqrt(((centroids[:, None, :] - centroids[None, :, :]) ** 2).sum(axis=2))
+        np.fill_diagonal(between, np.inf)
+        bound = np.maximum(between.min(axis=1)[labels] / 2, lower)
+
+        unsure = np.flatnonzero(upper * (1 + self.MARGIN) >= bound)
+        own = centroids[labels[unsure]]
+        upper[unsure] = np.sqrt(((self.points[unsure] - own) ** 2).sum(axis=1))
+        self.computed += len(unsure)
+        unsure = unsure[upper[unsure] * (1 + self.MARGIN) >= bound[unsure]]
+        labels[unsure], upper[unsure], lower[unsure] = _nearest_two(self.points[unsure], centroids)
+        self.rows += len(unsure)
+        return labels.copy()
+
+
+def kmeans_plus_plus(points, k, rng):
+    """Picks k starting centroids by k-means++ sampling.
+
+    Each new centroid is drawn with probability proportional to a point's
+    squared distance from the nearest centroid so far. The running minimum
+    keeps this at one vectorised pass over the points per centroid.
+    """
+    xs = np.ascontiguousarray(points[:, 0])
+    ys = np.ascontiguousarray(points[:, 1])
+
+    def squared_distances(pick):
+        distances = xs - xs[pick]
+        distances *= distances
+        dy = ys - ys[pick]
+        dy *= dy
+        distances += dy
+        return distances
+
+    chosen = [int(rng.integers(len(points)))]
+    closest = squared_distances(chosen[0])
+    running = np.empty_like(closest)
+    for _ in range(1, k):
+        np.cumsum(closest, out=running)
+        if running[-1] > 0:
+            pick = int(np.searchsorted(running, rng.random() * running[-1], side='right'))
+            pick = min(pick, len(points) - 1)
+        else:
+            # Every point sits on a centroid already; any point will do.
+            pick = int(rng.integers(len(points)))
+        chosen.append(pick)
+        np.minimum(closest, squared_distances(pick), out=closest)
+    return points[chosen].copy()
+
+
+def shift_threshold(points, tolerance=TOLERANCE):
+    """Largest squared distance a centroid may move in a converged iteration.
+
+    It is ``tolerance`` times the mean per-axis variance of the points, so the
+    same tolerance works whatever the scale of the coordinates.
+    """
+    return tolerance * float(points.var(axis=0).mean()) if len(points) else 0.0
+
+
+def converged(old, new, threshold):
+    """True once no centroid moved further than the threshold's square root."""
+    return float(((np.asarray(new) - np.asarray(old)) ** 2).sum(axis=1).max()) <= threshold
+
+
+def update_centroids(points, labels, centroids):
+    """Means of each cluster; an empty cluster keeps its previous centroid."""
+    k = len(centroids)
+    counts = np.bincount(labels, minlength=k)
+    sums = np.column_stack((np.bincount(labels, weights=points[:, 0], minlength=k),
+                            np.bincount(labels, weights=points[:, 1], minlength=k)))
+    new_centroids = centroids.copy()
+    filled = counts > 0
+    new_centroids[filled] = sums[filled] / counts[filled, None]
+    return new_centroids
+
+
+def reseed_empty(points, labels, centroids):
+    """Moves the centroid of every empty cluster onto a point far from its own.
+
+    Empty clusters, in index order, take the points farthest from their
+    assigned centroids, farthest first, so the same inputs always reseed the
+    same way.
+    """
+    empty = np.flatnonzero(np.bincount(labels, minlength=len(centroids)) == 0)
+    if not len(empty):
+        return centroids
+    distances = ((points - centroids[labels]) ** 2).sum(axis=1)
+    centroids = centroids.copy()
+    for cluster in empty:
+        farthest = int(distances.argmax())
+        centroids[cluster] = points[farthest]
+        distances[farthest] = -1
+    return centroids
+
+
+def lloyd(points, centroids, max_iterations, tolerance=TOLERANCE, assigner=None):
+    """Yields (labels, centroids) for each Lloyd iteration.
+
+    Stops early once every centroid moves less than shift_threshold(points,
+    tolerance) allows. ``assigner`` replaces assign() for the whole run, e.g.
+    a BoundedAssigner.
+    """
+    threshold = shift_threshold(points, tolerance)
+    for _ in range(max_iterations):
+        labels = assigner(centroids) if assigner is not None else assign(points, centroids)
+        new_centroids = update_centroids(points, labels, centroids)
+        yield labels, new_centroids
+        done = converged(centroids, new_centroids, threshold)
+        centroids = new_centroids
+        if done:
+            break
+
+
+def minibatch(points, centroids, max_iterations, batch_size, rng, tolerance=TOLERANCE):
+    """Yields (centroids, inertia estimate) for each mini-batch K-Means step.
+
+    Each step assigns ``batch_size`` points drawn at random and moves every
+    centroid to the running mean of all points it has been given so far, so
+    a step costs O(batch_size * k) however many points there are. The
+    estimate is the batch inertia scaled up to the full set and smoothed
+    across batches.
+
+    Centroid shifts shrink as 1/count whether or not the clustering has
+    settled, so the stopping test is on the estimate instead: stop once it
+    has not dropped by a relative ``tolerance`` for MINIBATCH_PATIENCE batches.
+    """
+    n, k = len(points), len(centroids)
+    batch_size = min(batch_size, n)
+    counts = np.zeros(k)
+    estimate = None
+    best = np.inf
+    stale = 0
+    for _ in range(max_iterations):
+        batch = points[rng.integers(n, size=batch_size)]
+        labels = assign(batch, centroids)
+        batch_inertia = float(((batch - centroids[labels]) ** 2).sum()) * n / batch_size
+        if estimate is None:
+            estimate = batch_inertia
+        else:
+            estimate += MINIBATCH_SMOOTHING * (batch_inertia - estimate)
+        hits = np.bincount(labels, minlength=k)
+        sums = np.column_stack((np.bincount(labels, weights=batch[:, 0], minlength=k),
+                                np.bincount(labels, weights=batch[:, 1], minlength=k)))
+        counts += hits
+        filled = hits > 0
+        new_centroids = centroids.copy()
+        new_centroids[filled] += (sums[filled] - hits[filled, None] * centroids[filled]) / counts[filled, None]
+        yield new_centroids, estimate
+        centroids = new_centroids
+        if estimate < best * (1 - tolerance):
+            best, stale = estimate, 0
+        else:
+            stale += 1
+        if stale >= MINIBATCH_PATIENCE:
+            break
+
+
+def inertia(points, centroids, labels):
+    """Sum of squared distances from every point to its centroid."""
+    return float(((points - centroids[labels]) ** 2).sum())
+
+
+def group_by_label(items, labels, k):
+    """Splits ``items`` into k lists according to ``labels``, keeping order."""
+    order = np.argsort(labels, kind='stable')
+    bounds = np.cumsum(np.bincount(labels, minlength=k))[:-1]
+    return [[items[i] for i in part.tolist()] for part in np.split(order, bounds)]
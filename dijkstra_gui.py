@@ -1,12 +1,17 @@
-import time
 import tkinter as tk
-from queue import PriorityQueue
 from tkinter import messagebox  # <-- Import messagebox
+from animator import FrameAnimator
+from gridsearch import Grid, run_search
+from incremental import LPAStar
 
 
 ROWS = 40
 WIDTH = 800
 GAP = WIDTH // ROWS
+# Replay speeds in cells per frame.
+DEFAULT_SPEED = 2
+MAX_SPEED = 40
+PATH_SPEED = 0.25
 
 class Node:
     def __init__(self, row, col, canvas):
@@ -17,9 +22,8 @@ class Node:
         self.y = row * GAP
         self.rect = canvas.create_rectangle(self.x, self.y, self.x + GAP, self.y + GAP, fill="white", outline="gray")
         self.neighbors = []
-        self.distance = float("inf")
-        self.previous = None
         self.type = "empty"
+        self.on_path = False
 
     def make_start(self):
         self.canvas.itemconfig(self.rect, fill="green")
@@ -40,6 +44,13 @@ class Node:
     def make_path(self):
         if self.type not in ("start", "end"):
             self.canvas.itemconfig(self.rect, fill="Yellow")
+            self.on_path = True
+
+    def clear_path(self):
+        if self.on_path:
+            self.on_path = False
+            if self.type == "empty":
+                self.canvas.itemconfig(self.rect, fill="sky blue")
 
     def reset(self):
         self.canvas.itemconfig(self.rect, fill="white")
@@ -57,68 +68,49 @@ def make_grid(canvas):
             grid[i].append(node)
     return grid
 
-def get_neighbors(node, grid):
-    neighbors = []
-    if node.row < ROWS - 1 and grid[node.row + 1][node.col].type != "wall":  # down
-        neighbors.append(grid[node.row + 1][node.col])
-    if node.row > 0 and grid[node.row - 1][node.col].type != "wall":  # up
-        neighbors.append(grid[node.row - 1][node.col])
-    if node.col < ROWS - 1 and grid[node.row][node.col + 1].type != "wall":  # right
-        neighbors.append(grid[node.row][node.col + 1])
-    if node.col > 0 and grid[node.row][node.col - 1].type != "wall":  # left
-        neighbors.append(grid[node.row][node.col - 1])
-    return neighbors
-
-def reconstruct_path(end, canvas):
-    current = end
-    path = []
-    while current:
-        path.append(current)
-        current = current.previous
-
-    path = path[::-1]  # Reverse to go from start to end
-
-    for node in path:
-        if node.type not in ("start", "end"):
-            node.make_path()
-            canvas.update()
-            time.sleep(0.1)
-
-def dijkstra(grid, start, end, canvas):
-    count = 0
-    open_set = PriorityQueue()
-    start.distance = 0
-    open_set.put((0, count, start))
-
-    while not open_set.empty():
-        current = open_set.get()[2]
-
-        if current == end:
-            reconstruct_path(end, canvas)
-            return True
-
-        for neighbor in get_neighbors(current, grid):
-            temp = current.distance + 1
-            if temp < neighbor.distance:
-                neighbor.distance = temp
-                neighbor.previous = current
-                count += 1
-                open_set.put((neighbor.distance, count, neighbor))
-
-        current.make_visited()
-        canvas.update()
-        time.sleep(0.03)
-    return False
+def search_grid(grid):
+    walls = [{"row": node.row, "col": node.col} for row in grid for node in row if node.type == "wall"]
+    return Grid.from_walls(ROWS, ROWS, walls)
+
+def sync_planner(planner, grid, start, end):
+    # Keep the search state between runs so a rerun only replans around the
+    # walls drawn since the last one.
+    cells = search_grid(grid)
+    if planner is None:
+        return LPAStar(cells, cells.index({"row": start.row, "col": start.col}),
+                       cells.index({"row": end.row, "col": end.col}), guided=False)
+    planner.sync(cells.walls)
+    return planner
+
+def dijkstra(grid, planner):
+    """Runs the search to completion; returns (visited nodes, path nodes) to replay."""
+    for row in grid:
+        for node in row:
+            node.clear_path()
+
+    def node_at(idx):
+        row, col = planner.grid.position(idx)
+        return grid[row][col]
+
+    visited = []
+    path = run_search(planner.steps(), visited.append)
+    return [node_at(idx) for idx in visited], [node_at(idx) for idx in path]
 
 def main():
     win = tk.Tk()
     win.title("Dijkstra Pathfinding")
     canvas = tk.Canvas(win, width=WIDTH, height=WIDTH)
     canvas.pack()
+    speed_scale = tk.Scale(win, from_=0, to=MAX_SPEED, orient=tk.HORIZONTAL, length=WIDTH,
+                           label="Cells per frame (0 = instant)")
+    speed_scale.set(DEFAULT_SPEED)
+    speed_scale.pack()
+    animator = FrameAnimator(canvas)
 
     grid = make_grid(canvas)
     start = None
     end = None
+    planner = None
     drawing = False  # for dragging to draw walls
 
     def get_node_at(event):
@@ -149,11 +141,23 @@ def main():
         drawing = False
 
     def on_key(event):
+        nonlocal planner
         if event.char == " " and start and end:
-            found = dijkstra(grid, start, end, canvas)
-            if not found:
-                # Show pop-up message
-                messagebox.showinfo("Pathfinding Result", "No path found! The end node is unreachable.")
+            # A rerun while the last replay is still going shows the rest of
+            # it first: the planner only reports cells whose distance changed.
+            animator.cancel(flush=True)
+            planner = sync_planner(planner, grid, start, end)
+            visited, path = dijkstra(grid, planner)
+            speed = speed_scale.get()
+
+            def show_path():
+                if not path:
+                    # Show pop-up message
+                    messagebox.showinfo("Pathfinding Result", "No path found! The end node is unreachable.")
+                    return
+                animator.play(path, Node.make_path, min(speed, PATH_SPEED))
+
+            animator.play(visited, Node.make_visited, speed, show_path)
 
     canvas.bind("<Button-1>", on_mouse_down)
     canvas.bind("<B1-Motion>", on_mouse_move)
@@ -0,0 +1,720 @@
+import copy
+import heapq
+import math
+from array import array
+from collections import deque
+from operator import itemgetter
+import numpy as np
+
+# Sentinel for cells the search has not reached yet.
+UNREACHED = np.iinfo(np.int32).max
+# Largest per-cell cost; costs fit in a byte on the wire.
+MAX_COST = 255
+
+
+class Grid:
+    """Flat, array-backed occupancy grid.
+
+    The wall bitmap is padded with a one-cell wall border, so cell (row, col)
+    lives at index ``(row + 1) * stride + col + 1`` and the four neighbours of
+    any cell are simply ``idx +/- stride`` and ``idx +/- 1`` with no bounds
+    checks in the search loops.
+
+    ``costs`` (None for unit costs) holds the cost of entering each cell, and
+    ``diagonal`` allows 8-connected moves. Only Dijkstra and A* honour them.
+    """
+
+    def __init__(self, rows, cols):
+        self.rows = rows
+        self.cols = cols
+        self.stride = cols + 2
+        self.size = (rows + 2) * self.stride
+        self.walls = np.zeros(self.size, dtype=np.bool_)
+        border = self.walls.reshape(rows + 2, self.stride)
+        border[0, :] = border[-1, :] = True
+        border[:, 0] = border[:, -1] = True
+        self.costs = None
+        self.min_cost = self.max_cost = 1
+        self.diagonal = False
+
+    @classmethod
+    def from_walls(cls, rows, cols, walls):
+        grid = cls(rows, cols)
+        if walls:
+            try:
+                r = list(map(itemgetter('row'), walls))
+                c = list(map(itemgetter('col'), walls))
+                valid = set(map(type, r)) | set(map(type, c)) == {int}
+            except (KeyError, TypeError):
+                valid = False
+            if not valid:
+                # Slow pass, just to report the first bad wall.
+                for wall in walls:
+                    _position(wall)
+            r = np.array(r, dtype=np.int64)
+            c = np.array(c, dtype=np.int64)
+            inside = (r >= 0) & (r < rows) & (c >= 0) & (c < cols)
+            grid.walls[(r[inside] + 1) * grid.stride + c[inside] + 1] = True
+        return grid
+
+    @classmethod
+    def from_mask(cls, rows, cols, mask):
+        """Grid from a boolean wall mask of rows * cols cells in row-major order."""
+        grid = cls(rows, cols)
+        grid.walls.reshape(rows + 2, cols + 2)[1:-1, 1:-1] = np.asarray(mask, dtype=np.bool_).reshape(rows, cols)
+        return grid
+
+    def set_costs(self, costs):
+        """Sets per-cell entry costs from a (rows, cols) array; 0 marks a wall."""
+        costs = np.asarray(costs).reshape(self.rows, self.cols)
+        if costs.size and (costs.min() < 0 or costs.max() > MAX_COST):
+            raise ValueError(f"Cell costs must be between 0 and {MAX_COST}")
+        open_costs = costs[costs > 0]
+        self.min_cost = int(open_costs.min()) if open_costs.size else 1
+        self.max_cost = int(open_costs.max()) if open_costs.size else 1
+        self.walls.reshape(self.rows + 2, self.stride)[1:-1, 1:-1] |= costs == 0
+        # Walls and the border get the cheapest cost, so stepping onto a walled
+        # end cell never undercuts the heuristic.
+        padded = np.full((self.rows + 2, self.stride), self.min_cost, dtype=np.int32)
+        padded[1:-1, 1:-1] = np.where(costs > 0, costs, self.min_cost)
+        self.costs = padded.ravel()
+
+    def copy(self):
+        """A copy with its own wall bitmap; the cost grid is shared, as nothing edits it."""
+        grid = copy.copy(self)
+        grid.walls = self.walls.copy()
+        return grid
+
+    @property
+    def uniform(self):
+        """True for unit-cost, 4-connected grids, the case every search supports."""
+        return self.costs is None and not self.diagonal
+
+    def index(self, pos):
+        row, col = _position(pos)
+        if not (0 <= row < self.rows and 0 <= col < self.cols):
+            raise ValueError(f"Position ({row}, {col}) is outside the {self.rows}x{self.cols} grid")
+        return (row + 1) * self.stride + col + 1
+
+    def cells(self, indices):
+        stride = self.stride
+        return [{"row": i // stride - 1, "col": i % stride - 1} for i in indices]
+
+    def flat_cells(self, indices):
+        """Row-major ``row * cols + col`` numbers for cell indices, as little-endian int32."""
+        row, col = np.divmod(np.asarray(indices, dtype=np.int64), self.stride)
+        return ((row - 1) * self.cols + col - 1).astype('<i4')
+
+    def position(self, idx):
+        row, col = divmod(idx, self.stride)
+        return row - 1, col - 1
+
+    def heuristic(self, a, b):
+        stride = self.stride
+        return abs(a // stride - b // stride) + abs(a % stride - b % stride)
+
+
+def _position(pos):
+    """(row, col) of a {"row", "col"} dict; ValueError unless both are integers."""
+    if not isinstance(pos, dict):
+        raise ValueError(f"Positions must be objects with row and col, got {pos!r}")
+    row, col = pos.get('row'), pos.get('col')
+    for value in (row, col):
+        if not isinstance(value, int) or isinstance(value, bool):
+            raise ValueError(f"Positions need integer row and col, got {pos!r}")
+    return row, col
+
+
+class BucketQueue:
+    """Dial's bucket queue for small non-negative integer keys.
+
+    Keys must stay within ``span`` of the smallest key still queued, which
+    holds on unit-cost grids (span 1 for Dijkstra, 2 for A* with the
+    Manhattan heuristic). Equal keys pop in FIFO order, the same tie-break
+    as the (priority, count) tuples the PriorityQueue loops used.
+    """
+
+    def __init__(self, span, first_key=0):
+        self.slots = span + 1
+        self.buckets = [deque() for _ in range(self.slots)]
+        self.key = first_key
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def push(self, key, item):
+        self.buckets[key % self.slots].append(item)
+        self.size += 1
+
+    def pop(self):
+        """Returns (key, item) for the oldest entry with the smallest key."""
+        bucket = self.buckets[self.key % self.slots]
+        while not bucket:
+            self.key += 1
+            bucket = self.buckets[self.key % self.slots]
+        self.size -= 1
+        return self.key, bucket.popleft()
+
+
+class HeapQueue:
+    """Binary heap with BucketQueue's interface, for keys that aren't small integers."""
+
+    def __init__(self):
+        self.heap = []
+        self.count = 0
+
+    @property
+    def size(self):
+        return len(self.heap)
+
+    def __len__(self):
+        return len(self.heap)
+
+    def push(self, key, item):
+        self.count += 1
+        heapq.heappush(self.heap, (key, self.count, item))
+
+    def pop(self):
+        key, _, item = heapq.heappop(self.heap)
+        return key, item
+
+
+def _scores(size):
+    return np.full(size, UNREACHED, dtype=np.int32)
+
+
+def _parents(size):
+    return np.full(size, -1, dtype=np.int32)
+
+
+def reconstruct_path(parent, end):
+    path = []
+    current = end
+    while current != -1:
+        path.append(current)
+        current = parent[current]
+    return path[::-1]
+
+
+def run_search(steps, on_visit):
+    """Drives a search generator, calling on_visit for every expanded cell.
+
+    Returns the path the generator finished with (empty if none was found).
+    """
+    while True:
+        try:
+            cell = next(steps)
+        except StopIteration as stop:
+            return stop.value
+        on_visit(cell)
+
+
+def dijkstra_steps(grid, start, end):
+    """Yields cells in expansion order (start excluded) and returns the path.
+
+    Each cell is expanded at most once: the closed bitmap drops any stale
+    queue entry left behind for a cell that has already been settled.
+    """
+    if not grid.uniform:
+        return (yield from weighted_steps(grid, start, end))
+    # memoryviews give cheap scalar access to the NumPy buffers in the hot loop.
+    walls = memoryview(grid.walls)
+    distance = _scores(grid.size)
+    parent = _parents(grid.size)
+    closed = bytearray(grid.size)
+    dist = memoryview(distance)
+    prev = memoryview(parent)
+    stride = grid.stride
+
+    open_set = BucketQueue(1)
+    push, pop = open_set.push, open_set.pop
+    dist[start] = 0
+    push(0, start)
+
+    while open_set.size:
+        current = pop()[1]
+        if closed[current]:
+            continue
+        closed[current] = 1
+        if current == end:
+            return reconstruct_path(prev, end)
+
+        temp = dist[current] + 1
+        # Down, up, right, left -- the order the original get_neighbors used.
+        for neighbor in (current + stride, current - stride, current + 1, current - 1):
+            if walls[neighbor] and neighbor != end:
+                continue
+            if temp < dist[neighbor]:
+                dist[neighbor] = temp
+                prev[neighbor] = current
+                push(temp, neighbor)
+
+        if current != start:
+            yield current
+
+    return []
+
+
+def a_star_steps(grid, start, end):
+    """Yields cells in expansion order (start excluded) and returns the path.
+
+    An improved g-score re-queues the cell under its lower f-score (lazy
+    decrease-key); the closed bitmap then skips the stale, higher entry.
+    """
+    if not grid.uniform:
+        return (yield from weighted_steps(grid, start, end, guided=True))
+    walls = memoryview(grid.walls)
+    g_scores = _scores(grid.size)
+    parent = _parents(grid.size)
+    closed = bytearray(grid.size)
+    g_score = memoryview(g_scores)
+    prev = memoryview(parent)
+    stride = grid.stride
+    end_row, end_col = divmod(end, stride)
+
+    first = grid.heuristic(start, end)
+    open_set = BucketQueue(2, first)
+    push, pop = open_set.push, open_set.pop
+    g_score[start] = 0
+    push(first, start)
+
+    while open_set.size:
+        current = pop()[1]
+        if closed[current]:
+            continue
+        closed[current] = 1
+        if current == end:
+            return reconstruct_path(prev, end)
+
+        temp_g_score = g_score[current] + 1
+        for neighbor in (current + stride, current - stride, current + 1, current - 1):
+            if walls[neighbor] and neighbor != end:
+                continue
+            if temp_g_score < g_score[neighbor] and not closed[neighbor]:
+                prev[neighbor] = current
+                g_score[neighbor] = temp_g_score
+                row, col = divmod(neighbor, stride)
+                push(temp_g_score + abs(row - end_row) + abs(col - end_col), neighbor)
+
+        if current != start:
+            yield current
+
+    return []
+
+
+def weighted_steps(grid, start, end, guided=False):
+    """Dijkstra, or A* with ``guided``, over ``grid.costs`` and ``grid.diagonal``.
+
+    Entering a cell costs its cost, times sqrt(2) on a diagonal. Diagonal
+    moves may not cut the corner of a wall. With 4-way moves the costs are
+    integers, so this still runs on a bucket queue sized to the largest cost.
+    Diagonals need a binary heap. The heuristic is the Manhattan or octile
+    distance times the cheapest cell cost.
+    """
+    walls = memoryview(grid.walls)
+    cost = memoryview(grid.costs if grid.costs is not None else np.ones(grid.size, dtype=np.int32))
+    parent = _parents(grid.size)
+    closed = bytearray(grid.size)
+    prev = memoryview(parent)
+    stride = grid.stride
+    end_row, end_col = divmod(end, stride)
+    floor = grid.min_cost
+
+    diagonal = math.sqrt(2)
+    # (offset, the two orthogonal cells the diagonal squeezes past)
+    diagonals = ()
+    if grid.diagonal:
+        diagonals = ((stride + 1, stride, 1), (stride - 1, stride, -1),
+                     (-stride + 1, -stride, 1), (-stride - 1, -stride, -1))
+        distance = np.full(grid.size, np.inf)
+        slack = (diagonal - 1) * floor
+
+        def estimate(cell):
+            row, col = divmod(cell, stride)
+            dy, dx = abs(row - end_row), abs(col - end_col)
+            return floor * max(dy, dx) + slack * min(dy, dx)
+
+        open_set = HeapQueue()
+    else:
+        distance = np.full(grid.size, np.iinfo(np.int64).max, dtype=np.int64)
+
+        def estimate(cell):
+            row, col = divmod(cell, stride)
+            return floor * (abs(row - end_row) + abs(col - end_col))
+
+        first = estimate(start) if guided else 0
+        open_set = BucketQueue(grid.max_cost + (floor if guided else 0), first)
+
+    dist = memoryview(distance)
+    push, pop = open_set.push, open_set.pop
+    dist[start] = 0
+    push(estimate(start) if guided else 0, start)
+
+    while open_set.size:
+        current = pop()[1]
+        if closed[current]:
+            continue
+        closed[current] = 1
+        if current == end:
+            return reconstruct_path(prev, end)
+
+        base = dist[current]
+        for neighbor in (current + stride, current - stride, current + 1, current - 1):
+            if walls[neighbor] and neighbor != end:
+                continue
+            temp = base + cost[neighbor]
+            if temp < dist[neighbor]:
+                dist[neighbor] = temp
+                prev[neighbor] = current
+                push(temp + estimate(neighbor) if guided else temp, neighbor)
+        for offset, side, other_side in diagonals:
+            neighbor = current + offset
+            if (walls[neighbor] and neighbor != end) or walls[current + side] or walls[current + other_side]:
+                continue
+            temp = base + cost[neighbor] * diagonal
+            # Float rounding must not re-parent a settled cell.
+            if temp < dist[neighbor] and not closed[neighbor]:
+                dist[neighbor] = temp
+                prev[neighbor] = current
+                push(temp + estimate(neighbor) if guided else temp, neighbor)
+
+        if current != start:
+            yield current
+
+    return []
+
+
+def bidirectional_steps(grid, start, end, guided=False):
+    """Searches from both ends at once and splices the paths where they meet.
+
+    Yields cells in expansion order from either frontier (start and end
+    excluded) and returns the path. Each step expands the side with the
+    smaller queue. ``best`` is the shortest start-to-end route seen through
+    any edge between the two searches; the search stops once the smallest
+    keys on the two sides add up to at least that, so the route is optimal.
+
+    With ``guided`` both sides use the average of the forward and backward
+    Manhattan potentials (bidirectional A*). Keys are doubled to keep them
+    integral, so moves change a key by 0..4 and the bucket queues still work.
+    """
+    if start == end:
+        return [start]
+    walls = memoryview(grid.walls)
+    stride = grid.stride
+    start_row, start_col = divmod(start, stride)
+    end_row, end_col = divmod(end, stride)
+
+    def potential(cell):
+        row, col = divmod(cell, stride)
+        return abs(row - end_row) + abs(col - end_col) - abs(row - start_row) - abs(col - start_col)
+
+    roots = (start, end)
+    signs = (1, -1)
+    scores = (_scores(grid.size), _scores(grid.size))
+    parents = (_parents(grid.size), _parents(grid.size))
+    dist = [memoryview(s) for s in scores]
+    prev = [memoryview(p) for p in parents]
+    closed = (bytearray(grid.size), bytearray(grid.size))
+    first = potential(start) if guided else 0
+    queues = (BucketQueue(4 if guided else 2, first), BucketQueue(4 if guided else 2, first))
+    for side in (0, 1):
+        dist[side][roots[side]] = 0
+        queues[side].push(first, roots[side])
+
+    best = UNREACHED
+    meet = None
+    while queues[0].size and queues[1].size:
+        side = 0 if queues[0].size <= queues[1].size else 1
+        queue, other_queue = queues[side], queues[1 - side]
+        key, current = queue.pop()
+        here, there = closed[side], dist[1 - side]
+        if here[current]:
+            continue
+        if key + other_queue.key >= 2 * best:
+            break
+        here[current] = 1
+        ours, links = dist[side], prev[side]
+        # Each side may step onto the other's root even if it is drawn over a wall.
+        goal, sign = roots[1 - side], signs[side]
+
+        temp = ours[current] + 1
+        for neighbor in (current + stride, current - stride, current + 1, current - 1):
+            if walls[neighbor] and neighbor != goal:
+                continue
+            if temp < ours[neighbor]:
+                ours[neighbor] = temp
+                links[neighbor] = current
+                queue.push(2 * temp + sign * potential(neighbor) if guided else 2 * temp, neighbor)
+            if there[neighbor] != UNREACHED and temp + there[neighbor] < best:
+                best = temp + there[neighbor]
+                meet = (current, neighbor) if side == 0 else (neighbor, current)
+
+        if current != start and current != end:
+            yield current
+
+    if meet is None:
+        return []
+    return reconstruct_path(prev[0], meet[0]) + reconstruct_path(prev[1], meet[1])[::-1]
+
+
+def jps_steps(grid, start, end):
+    """Jump Point Search for 4-connected, uniform-cost grids.
+
+    Yields expanded jump points (start excluded) and returns the full
+    cell-by-cell path. Straight runs with no forced neighbours are skipped
+    without being queued. A vertical run also stops wherever a horizontal
+    scan from it would find a jump point, which keeps the paths optimal
+    with 4-way moves.
+    """
+    walls = memoryview(grid.walls)
+    g_scores = _scores(grid.size)
+    parent = _parents(grid.size)
+    closed = bytearray(grid.size)
+    g_score = memoryview(g_scores)
+    prev = memoryview(parent)
+    stride = grid.stride
+    end_row, end_col = divmod(end, stride)
+
+    def blocked(cell):
+        return walls[cell] and cell != end
+
+    def jump_horizontal(cell, step):
+        while not blocked(cell):
+            if cell == end:
+                return cell
+            for side in (stride, -stride):
+                if not blocked(cell + side) and blocked(cell - step + side):
+                    return cell
+            cell += step
+        return -1
+
+    def jump(cell, step):
+        if step in (1, -1):
+            return jump_horizontal(cell, step)
+        while not blocked(cell):
+            if cell == end:
+                return cell
+            for side in (1, -1):
+                if not blocked(cell + side) and blocked(cell - step + side):
+                    return cell
+            if jump_horizontal(cell + 1, 1) != -1 or jump_horizontal(cell - 1, -1) != -1:
+                return cell
+            cell += step
+        return -1
+
+    count = 0
+    g_score[start] = 0
+    open_set = [(grid.heuristic(start, end), count, start)]
+
+    while open_set:
+        current = heapq.heappop(open_set)[2]
+        if closed[current]:
+            continue
+        closed[current] = 1
+        if current == end:
+            return _expand_jumps(reconstruct_path(prev, end), stride)
+
+        if current == start:
+            steps = (stride, -stride, 1, -1)
+        else:
+            delta = current - prev[current]
+            if -stride < delta < stride:
+                step = 1 if delta > 0 else -1
+                steps = (step, stride, -stride)
+            else:
+                step = stride if delta > 0 else -stride
+                steps = (step, 1, -1)
+
+        for step in steps:
+            point = jump(current + step, step)
+            if point == -1 or closed[point]:
+                continue
+            temp_g_score = g_score[current] + abs(point - current) // abs(step)
+            if temp_g_score < g_score[point]:
+                prev[point] = current
+                g_score[point] = temp_g_score
+                row, col = divmod(point, stride)
+                count += 1
+                heapq.heappush(open_set, (temp_g_score + abs(row - end_row) + abs(col - end_col), count, point))
+
+        if current != start:
+            yield current
+
+    return []
+
+
+def _expand_jumps(points, stride):
+    """Fills in the straight runs between consecutive jump points."""
+    path = points[:1]
+    for a, b in zip(points, points[1:]):
+        step = (1 if b > a else -1) * (1 if abs(b - a) < stride else stride)
+        path.extend(range(a + step, b + step, step))
+    return path
+
+
+def _collect(steps):
+    visited = array('i')
+    path = run_search(steps, visited.append)
+    return bool(path), path, visited
+
+
+def dijkstra(grid, start, end):
+    """Returns (found, path, visited) as sequences of flat cell indices."""
+    return _collect(dijkstra_steps(grid, start, end))
+
+
+def a_star(grid, start, end):
+    """Returns (found, path, visited) as sequences of flat cell indices."""
+    return _collect(a_star_steps(grid, start, end))
+
+
+def bidirectional_dijkstra(grid, start, end):
+    """Returns (found, path, visited); visited interleaves both frontiers."""
+    return _collect(bidirectional_steps(grid, start, end))
+
+
+def bidirectional_a_star(grid, start, end):
+    """Returns (found, path, visited); visited interleaves both frontiers."""
+    return _collect(bidirectional_steps(grid, start, end, guided=True))
+
+
+def jps(grid, start, end):
+    """Returns (found, path, visited); visited holds the expanded jump points."""
+    return _collect(jps_steps(grid, start, end))
+
+
+def distance_field(grid, target):
+    """Unit-cost distance from every cell to ``target`` (UNREACHED if cut off).
+
+    A breadth-first search run one whole frontier at a time with NumPy, so
+    the Python-level work is per BFS layer rather than per cell.
+    """
+    passable = ~grid.walls
+    passable[target] = True
+    field = _scores(grid.size)
+    field[target] = 0
+    # Scratch slots used to drop duplicate candidates without sorting.
+    slot = np.empty(grid.size, dtype=np.int64)
+    offsets = np.array([grid.stride, -grid.stride, 1, -1])
+    frontier = np.array([target])
+    distance = 0
+    while frontier.size:
+        distance += 1
+        candidates = (frontier[:, None] + offsets).ravel()
+        candidates = candidates[passable[candidates]]
+        candidates = candidates[field[candidates] == UNREACHED]
+        order = np.arange(candidates.size)
+        slot[candidates] = order
+        frontier = candidates[slot[candidates] == order]
+        field[frontier] = distance
+    return field
+
+
+def path_from_field(grid, field, start):
+    """Follows the gradient of a distance field from ``start`` to its target.
+
+    Returns the path as flat cell indices, or an empty list if the target
+    can't be reached. Costs O(path length).
+    """
+    values = memoryview(field)
+    stride = grid.stride
+    remaining = values[start]
+    if remaining == UNREACHED:
+        # A start cell drawn over a wall still leaves through its open neighbours.
+        remaining = min(values[n] for n in (start + stride, start - stride, start + 1, start - 1))
+        if remaining == UNREACHED:
+            return []
+        remaining += 1
+    path = [start]
+    current = start
+    while remaining:
+        remaining -= 1
+        for current in (current + stride, current - stride, current + 1, current - 1):
+            if values[current] == remaining:
+                break
+        path.append(current)
+    return path
+
+
+def group_queries(pairs):
+    """Greedily groups (start, end) pairs that share a target or a source.
+
+    Returns (kind, cell, query indices) tuples. A "target" or "source" group
+    is answered from one distance field rooted at ``cell``; the remaining
+    "single" queries don't share an endpoint and are searched one by one.
+    """
+    by_target, by_source = {}, {}
+    for i, (start, end) in enumerate(pairs):
+        by_target.setdefault(end, set()).add(i)
+        by_source.setdefault(start, set()).add(i)
+
+    # Largest remaining group first; entries go stale as queries are claimed
+    # and are re-pushed with their current size when popped.
+    heap = [(-len(q), 0, cell) for cell, q in by_target.items()]
+    heap += [(-len(q), 1, cell) for cell, q in by_source.items()]
+    heapq.heapify(heap)
+    groups = []
+    while heap:
+        size, side, cell = heapq.heappop(heap)
+        members = (by_target, by_source)[side].get(cell)
+        if not members:
+            continue
+        if len(members) != -size:
+            heapq.heappush(heap, (-len(members), side, cell))
+            continue
+        if len(members) < 2:
+            break
+        members = sorted(members)
+        groups.append((("target", "source")[side], cell, members))
+        for i in members:
+            start, end = pairs[i]
+            for index, key in ((by_target, end), (by_source, start)):
+                index[key].discard(i)
+                if not index[key]:
+                    del index[key]
+    groups.extend(("single", None, [i]) for queries in by_target.values() for i in sorted(queries))
+    return groups
+
+
+def solve_group(grid, pairs, group):
+    """Returns [(query index, path)] for one group from group_queries."""
+    kind, cell, indices = group
+    if kind == "single":
+        start, end = pairs[indices[0]]
+        return [(indices[0], run_search(a_star_steps(grid, start, end), _ignore))]
+    field = distance_field(grid, cell)
+    if kind == "target":
+        return [(i, path_from_field(grid, field, pairs[i][0])) for i in indices]
+    # Moves are symmetric, so a source-rooted field is walked back from the end.
+    return [(i, path_from_field(grid, field, pairs[i][1])[::-1]) for i in indices]
+
+
+def _ignore(cell):
+    pass
+
+
+def solve_groups(grid, pairs, groups):
+    """Returns [(query index, path)] for a list of groups from group_queries."""
+    return [answer for group in groups for answer in solve_group(grid, pairs, group)]
+
+
+def solve_batch(grid, pairs, chunks=1, run_chunks=None):
+    """Paths for many (start, end) pairs on one grid, in input order.
+
+    The groups are dealt round-robin into up to ``chunks`` lists, largest
+    first, so the chunks come out about even. ``run_chunks`` takes those
+    lists and returns their solve_groups() answers, e.g. by handing each to
+    a worker. By default they are solved here in turn.
+    """
+    groups = group_queries(pairs)
+    parts = [groups[i::chunks] for i in range(max(1, min(chunks, len(groups))))]
+    if run_chunks is None:
+        solved = [solve_groups(grid, pairs, part) for part in parts]
+    else:
+        solved = run_chunks(parts)
+    paths = [None] * len(pairs)
+    for answers in solved:
+        for i, path in answers:
+            paths[i] = path
+    return paths, len(groups)
@@ -0,0 +1,365 @@
+import copy
+import heapq
+from collections import deque
+import numpy as np
+from gridsearch import UNREACHED, _scores
+
+# Open runs along a cluster boundary at least this long get a transition at
+# each end instead of one in the middle.
+ENTRANCE_SPLIT = 6
+
+
+class HierarchicalMap:
+    """HPA* abstraction of a Grid.
+
+    The grid is cut into ``cluster_size`` squares. Along every boundary
+    between two clusters, each run of cells open on both sides becomes one or
+    two transitions, a pair of abstract nodes joined by a unit edge. Inside a
+    cluster every pair of nodes is joined by its in-cluster distance. A query
+    searches this small graph and then refines each abstract edge with a
+    BFS confined to one cluster.
+
+    Paths are near-optimal, not optimal: they must cross clusters at
+    transitions. update() rebuilds only the boundaries and clusters that a
+    set of changed cells touches, and copy() shares everything else.
+    """
+
+    def __init__(self, grid, cluster_size=16):
+        self.grid = grid
+        self.cluster_size = cluster_size
+        self.cluster_rows = -(-grid.rows // cluster_size)
+        self.cluster_cols = -(-grid.cols // cluster_size)
+        clusters = self.cluster_rows * self.cluster_cols
+        self.cluster = self._cluster_ids()
+        # Boundary -> [(cell, cell across)]; a boundary is (cluster, 0) for the
+        # one below the cluster and (cluster, 1) for the one to its right.
+        # The lists here and in partners are replaced, never edited, so
+        # copies can share them.
+        self.transitions = {}
+        self.partners = {}
+        # Per cluster: node -> {node: in-cluster distance}.
+        self.edges = [{} for _ in range(clusters)]
+        # Grid-sized BFS scratch, allocated on first use; see _scratch().
+        self._field = self._slot = None
+        for cluster in range(clusters):
+            row, col = divmod(cluster, self.cluster_cols)
+            if row + 1 < self.cluster_rows:
+                self._link((cluster, 0))
+            if col + 1 < self.cluster_cols:
+                self._link((cluster, 1))
+        self._connect(range(clusters))
+
+    def _cluster_ids(self):
+        """Cluster of every cell, -1 on the border."""
+        grid = self.grid
+        cluster = np.full(grid.size, -1, dtype=np.int32)
+        rows = np.arange(grid.rows) // self.cluster_size
+        cols = np.arange(grid.cols) // self.cluster_size
+        cluster.reshape(grid.rows + 2, grid.stride)[1:-1, 1:-1] = rows[:, None] * self.cluster_cols + cols
+        return cluster
+
+    def _scratch(self):
+        if self._field is None:
+            self._field = _scores(self.grid.size)
+            self._slot = np.empty(self.grid.size, dtype=np.int64)
+        return self._field, self._slot
+
+    def __getstate__(self):
+        # The cluster ids and scratch buffers are as large as the grid but
+        # cheap to rebuild, so they aren't pickled.
+        state = self.__dict__.copy()
+        state.update(cluster=None, _field=None, _slot=None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.cluster = self._cluster_ids()
+
+    def copy(self):
+        """A copy that can be edited without changing this map.
+
+        Only the wall bitmap is copied. The cluster ids are shared, and so are
+        the transitions and edges of every cluster until update() replaces
+        them, so a copy costs about a pointer per cluster and transition.
+        """
+        other = copy.copy(self)
+        other.grid = self.grid.copy()
+        other.transitions = dict(self.transitions)
+        other.partners = dict(self.partners)
+        other.edges = list(self.edges)
+        other._field = other._slot = None
+        return other
+
+    def node_count(self):
+        return sum(len(edges) for edges in self.edges)
+
+    def _boundary_cells(self, boundary):
+        cluster, side = boundary
+        size, stride = self.cluster_size, self.grid.stride
+        row, col = divmod(cluster, self.cluster_cols)
+        if side == 0:
+            cols = np.arange(col * size, min(col * size + size, self.grid.cols))
+            inner = ((row + 1) * size) * stride + cols + 1
+            return inner, inner + stride
+        rows = np.arange(row * size, min(row * size + size, self.grid.rows))
+        inner = (rows + 1) * stride + (col + 1) * size
+        return inner, inner + 1
+
+    def _sides(self, boundary):
+        cluster, side = boundary
+        return cluster, cluster + (self.cluster_cols if side == 0 else 1)
+
+    def _link(self, boundary):
+        """Recomputes the transitions across one boundary."""
+        for a, b in self.transitions.pop(boundary, ()):
+            for cell, partner in ((a, b), (b, a)):
+                remaining = [other for other in self.partners[cell] if other != partner]
+                if remaining:
+                    self.partners[cell] = remaining
+                else:
+                    del self.partners[cell]
+        inner, outer = self._boundary_cells(boundary)
+        walls = self.grid.walls
+        open_run = np.concatenate(([False], ~walls[inner] & ~walls[outer], [False]))
+        steps = np.diff(open_run.astype(np.int8))
+        transitions = []
+        for lo, hi in zip(np.flatnonzero(steps == 1).tolist(), np.flatnonzero(steps == -1).tolist()):
+            picks = ((lo + hi - 1) // 2,) if hi - lo < ENTRANCE_SPLIT else (lo, hi - 1)
+            for i in picks:
+                a, b = int(inner[i]), int(outer[i])
+                transitions.append((a, b))
+                self.partners[a] = self.partners.get(a, []) + [b]
+                self.partners[b] = self.partners.get(b, []) + [a]
+        if transitions:
+            self.transitions[boundary] = transitions
+
+    def _nodes(self, cluster):
+        row, col = divmod(cluster, self.cluster_cols)
+        # (boundary, which cell of each transition pair lies in this cluster)
+        sides = [((cluster, 0), 0), ((cluster, 1), 0)]
+        if row > 0:
+            sides.append(((cluster - self.cluster_cols, 0), 1))
+        if col > 0:
+            sides.append(((cluster - 1, 1), 1))
+        nodes = set()
+        for boundary, mine in sides:
+            nodes.update(pair[mine] for pair in self.transitions.get(boundary, ()))
+        return sorted(nodes)
+
+    def _connect(self, clusters):
+        """Recomputes the intra-cluster edges of ``clusters``.
+
+        Pass j runs one BFS from the j-th node of every cluster at once; the
+        waves can't leave their own cluster, so they never interfere.
+        """
+        clusters = list(clusters)
+        node_lists = [self._nodes(cluster) for cluster in clusters]
+        bounds = np.cumsum([0] + [len(nodes) for nodes in node_lists]).tolist()
+        for cluster, nodes in zip(clusters, node_lists):
+            self.edges[cluster] = {node: {} for node in nodes}
+        field, _ = self._scratch()
+        every = np.array([node for nodes in node_lists for node in nodes], dtype=np.int64)
+        width = max(map(len, node_lists), default=0)
+        for j in range(width):
+            owners = [i for i, nodes in enumerate(node_lists) if len(nodes) > j]
+            touched = self._confined_bfs(np.array([node_lists[i][j] for i in owners], dtype=np.int64))
+            distances = field[every].tolist()
+            for i in owners:
+                nodes = node_lists[i]
+                edges = self.edges[clusters[i]][nodes[j]]
+                for k, distance in enumerate(distances[bounds[i]:bounds[i + 1]]):
+                    if distance != UNREACHED and k != j:
+                        edges[nodes[k]] = distance
+            field[touched] = UNREACHED
+        for cluster in clusters:
+            self.edges[cluster] = _prune(self.edges[cluster])
+
+    def _confined_bfs(self, sources):
+        """Frontier BFS into self._field that never crosses a cluster boundary.
+
+        Returns every cell it labelled so the caller can reset the field.
+        """
+        walls, cluster = self.grid.walls, self.cluster
+        field, slot = self._scratch()
+        offsets = np.array([self.grid.stride, -self.grid.stride, 1, -1])
+        frontier = sources
+        field[frontier] = 0
+        touched = [frontier]
+        distance = 0
+        while frontier.size:
+            distance += 1
+            candidates = (frontier[:, None] + offsets).ravel()
+            origins = np.repeat(frontier, 4)
+            keep = ~walls[candidates] & (cluster[candidates] == cluster[origins])
+            candidates = candidates[keep]
+            candidates = candidates[field[candidates] == UNREACHED]
+            order = np.arange(candidates.size)
+            slot[candidates] = order
+            frontier = candidates[slot[candidates] == order]
+            field[frontier] = distance
+            touched.append(frontier)
+        return np.concatenate(touched)
+
+    def update(self, cells):
+        """Repairs the abstraction after the walls at ``cells`` changed.
+
+        Returns how many clusters had their edges rebuilt.
+        """
+        size = self.cluster_size
+        boundaries = set()
+        clusters = set()
+        for cell in cells:
+            row, col = self.grid.position(cell)
+            cluster = int(self.cluster[cell])
+            cluster_row, cluster_col = divmod(cluster, self.cluster_cols)
+            clusters.add(cluster)
+            if row % size == size - 1 and cluster_row + 1 < self.cluster_rows:
+                boundaries.add((cluster, 0))
+            if row % size == 0 and cluster_row > 0:
+                boundaries.add((cluster - self.cluster_cols, 0))
+            if col % size == size - 1 and cluster_col + 1 < self.cluster_cols:
+                boundaries.add((cluster, 1))
+            if col % size == 0 and cluster_col > 0:
+                boundaries.add((cluster - 1, 1))
+        for boundary in boundaries:
+            self._link(boundary)
+            clusters.update(self._sides(boundary))
+        self._connect(sorted(clusters))
+        return len(clusters)
+
+    def set_walls(self, cells, wall=True):
+        self.grid.walls[cells] = wall
+        return self.update(cells)
+
+    def _local_search(self, source, target=None):
+        """BFS from ``source`` inside its cluster; returns (distance, parent) dicts.
+
+        Stops early once ``target`` is labelled.
+        """
+        walls = self.grid.walls
+        cluster = self.cluster
+        home = cluster[source]
+        stride = self.grid.stride
+        distance = {source: 0}
+        parent = {source: None}
+        queue = deque([source])
+        while queue:
+            current = queue.popleft()
+            step = distance[current] + 1
+            for neighbor in (current + stride, current - stride, current + 1, current - 1):
+                if neighbor in distance or walls[neighbor] or cluster[neighbor] != home:
+                    continue
+                distance[neighbor] = step
+                parent[neighbor] = current
+                if neighbor == target:
+                    return distance, parent
+                queue.append(neighbor)
+        return distance, parent
+
+    def _local_path(self, a, b):
+        _, parent = self._local_search(a, b)
+        path = []
+        while b is not None:
+            path.append(b)
+            b = parent[b]
+        return path[::-1]
+
+    def find_path(self, start, end):
+        """Returns a near-shortest path as flat cell indices, or [] if none.
+
+        start and end join the abstract graph for this query only, through a
+        BFS in their own clusters. Like the flat searches, a start or end drawn
+        over a wall is still usable: it is opened for the query and restored
+        afterwards.
+        """
+        if start == end:
+            return [start]
+        opened = [cell for cell in (start, end) if self.grid.walls[cell]]
+        if opened:
+            self.set_walls(opened, False)
+        try:
+            return self._search(start, end)
+        finally:
+            if opened:
+                self.set_walls(opened, True)
+
+    def _search(self, start, end):
+        grid = self.grid
+        stride = grid.stride
+        cluster = self.cluster
+        start_cluster, end_cluster = cluster[start], cluster[end]
+
+        reach, _ = self._local_search(start)
+        start_links = {node: reach[node] for node in self.edges[start_cluster] if node in reach}
+        if start_cluster == end_cluster and end in reach:
+            start_links[end] = reach[end]
+        back, _ = self._local_search(end)
+        end_links = {node: back[node] for node in self.edges[end_cluster] if node in back}
+
+        end_row, end_col = divmod(end, stride)
+        g_score = {start: 0}
+        parent = {start: None}
+        closed = set()
+        count = 0
+        open_set = [(grid.heuristic(start, end), 0, count, start)]
+        while open_set:
+            current = heapq.heappop(open_set)[3]
+            if current in closed:
+                continue
+            closed.add(current)
+            if current == end:
+                abstract = []
+                while current is not None:
+                    abstract.append(current)
+                    current = parent[current]
+                return self._refine(abstract[::-1])
+
+            links = list(self.edges[cluster[current]].get(current, {}).items())
+            links += [(partner, 1) for partner in self.partners.get(current, ())]
+            if current == start:
+                links += start_links.items()
+            if current in end_links:
+                links.append((end, end_links[current]))
+            for neighbor, cost in links:
+                temp_g_score = g_score[current] + cost
+                if neighbor not in closed and temp_g_score < g_score.get(neighbor, UNREACHED):
+                    g_score[neighbor] = temp_g_score
+                    parent[neighbor] = current
+                    row, col = divmod(neighbor, stride)
+                    count += 1
+                    heapq.heappush(open_set, (temp_g_score + abs(row - end_row) + abs(col - end_col),
+                                              -temp_g_score, count, neighbor))
+        return []
+
+    def _refine(self, abstract):
+        """Expands abstract edges into cells, one cluster-local BFS per edge."""
+        stride = self.grid.stride
+        path = abstract[:1]
+        for a, b in zip(abstract, abstract[1:]):
+            if abs(a - b) in (1, stride):
+                path.append(b)
+            else:
+                path.extend(self._local_path(a, b)[1:])
+        return path
+
+
+def _prune(edges):
+    """Drops edges a-c that are as long as some route a-b-c inside the cluster.
+
+    Both legs of such a route are strictly shorter than a-c, so by induction
+    every node-to-node distance survives with far fewer edges to relax.
+    """
+    nodes = list(edges)
+    if len(nodes) < 3:
+        return edges
+    where = {node: i for i, node in enumerate(nodes)}
+    lengths = np.full((len(nodes), len(nodes)), UNREACHED, dtype=np.int64)
+    for node, links in edges.items():
+        row = where[node]
+        for other, distance in links.items():
+            lengths[row, where[other]] = distance
+    via = (lengths[:, :, None] + lengths[None, :, :]).min(axis=1)
+    keep = ((lengths < via) & (lengths != UNREACHED)).tolist()
+    lengths = lengths.tolist()
+    return {node: {other: distance for other, distance, kept in zip(nodes, lengths[row], keep[row]) if kept}
+            for row, node in enumerate(nodes)}
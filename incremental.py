@@ -0,0 +1,140 @@
+import heapq
+import numpy as np
+from gridsearch import UNREACHED, _scores
+
+
+class LPAStar:
+    """Lifelong Planning A* between a fixed start and end on a Grid.
+
+    g and rhs survive between searches, so after set_walls() the next
+    steps() run re-expands only the cells whose distance from the start
+    actually changed, not the whole search. With ``guided`` off the keys
+    carry no heuristic and it replans like an incremental Dijkstra.
+
+    As in the flat searches, the end cell is enterable even if it is a wall
+    and the start can always be left.
+    """
+
+    def __init__(self, grid, start, end, guided=True):
+        self.grid = grid
+        self.start = start
+        self.end = end
+        self.guided = guided
+        # memoryviews give cheap scalar access to the NumPy buffers, as in gridsearch.
+        self._walls = memoryview(grid.walls)
+        self._g = memoryview(_scores(grid.size))
+        self._rhs = memoryview(_scores(grid.size))
+        self._rhs[start] = 0
+        self._end_row, self._end_col = divmod(end, grid.stride)
+        self._open = []
+        self._count = 0
+        self._update(start)
+
+    def _estimate(self, cell):
+        if not self.guided:
+            return 0
+        row, col = divmod(cell, self.grid.stride)
+        return abs(row - self._end_row) + abs(col - self._end_col)
+
+    def _key(self, cell):
+        best = min(self._g[cell], self._rhs[cell])
+        return best + self._estimate(cell), best
+
+    def _update(self, cell):
+        """Recomputes rhs for ``cell`` and queues it if it is now inconsistent."""
+        g, rhs = self._g, self._rhs
+        if cell != self.start:
+            if self._walls[cell] and cell != self.end:
+                rhs[cell] = UNREACHED
+            else:
+                stride = self.grid.stride
+                best = min(g[cell + stride], g[cell - stride], g[cell + 1], g[cell - 1])
+                rhs[cell] = best + 1 if best != UNREACHED else UNREACHED
+        if g[cell] != rhs[cell]:
+            self._count += 1
+            heapq.heappush(self._open, (*self._key(cell), self._count, cell))
+
+    def _top(self):
+        """Drops stale heap entries; returns the smallest live key or None.
+
+        Every change to a cell's key pushes a fresh entry, so an entry whose
+        key no longer matches, or whose cell is consistent again, is stale.
+        """
+        open_set, g, rhs = self._open, self._g, self._rhs
+        while open_set:
+            k1, k2, _, cell = open_set[0]
+            if g[cell] != rhs[cell] and (k1, k2) == self._key(cell):
+                return k1, k2
+            heapq.heappop(open_set)
+        return None
+
+    def set_walls(self, cells, wall=True):
+        """Marks ``cells`` as walls (or open) and queues the cells this affects.
+
+        Costs depend only on the cell being entered, so only the changed
+        cells themselves need their rhs recomputed here.
+        """
+        self.grid.walls[cells] = wall
+        for cell in cells:
+            self._update(cell)
+
+    def sync(self, walls):
+        """Applies a full wall bitmap as a diff; returns how many cells changed."""
+        changed = np.flatnonzero(walls != self.grid.walls)
+        added = changed[walls[changed]].tolist()
+        removed = changed[~walls[changed]].tolist()
+        if added:
+            self.set_walls(added, True)
+        if removed:
+            self.set_walls(removed, False)
+        return len(changed)
+
+    def steps(self):
+        """Repairs the search; yields expanded cells (start excluded), returns the path."""
+        g, rhs, walls = self._g, self._rhs, self._walls
+        stride = self.grid.stride
+        start, end = self.start, self.end
+        open_set, heappush = self._open, heapq.heappush
+        count = self._count
+        while True:
+            top = self._top()
+            if top is None or (top >= self._key(end) and g[end] == rhs[end]):
+                break
+            cell = heapq.heappop(self._open)[3]
+            if g[cell] > rhs[cell]:
+                # Settling a cell can only lower its neighbours' rhs, so compare
+                # against it instead of rescanning every neighbour's neighbours.
+                g[cell] = rhs[cell]
+                step = g[cell] + 1
+                for neighbor in (cell + stride, cell - stride, cell + 1, cell - 1):
+                    if step < rhs[neighbor] and neighbor != start and (not walls[neighbor] or neighbor == end):
+                        rhs[neighbor] = step
+                        if g[neighbor] != step:
+                            count += 1
+                            heappush(open_set, (step + self._estimate(neighbor), step, count, neighbor))
+                self._count = count
+            else:
+                g[cell] = UNREACHED
+                self._update(cell)
+                for neighbor in (cell + stride, cell - stride, cell + 1, cell - 1):
+                    self._update(neighbor)
+                count = self._count
+            if cell != self.start and cell != end:
+                yield cell
+        return self.path()
+
+    def path(self):
+        """Walks back from the end along decreasing g; [] if unreachable."""
+        g = self._g
+        if g[self.end] == UNREACHED:
+            return []
+        stride = self.grid.stride
+        current = self.end
+        path = [current]
+        while current != self.start:
+            want = g[current] - 1
+            for current in (current + stride, current - stride, current + 1, current - 1):
+                if g[current] == want:
+                    break
+            path.append(current)
+        return path[::-1]
@@ -1,9 +1,23 @@
+import queue
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox
-import random
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.colors import to_rgba_array
+from matplotlib.lines import Line2D
+from clustering import assign, converged, kmeans_plus_plus, reseed_empty, shift_threshold, update_centroids
+
+COLORS = ['red', 'green', 'blue', 'purple', 'orange', 'cyan', 'magenta']
+PALETTE = to_rgba_array(COLORS)
+# Generated points, and so the fixed axes, span 0..10 on both axes.
+EXTENT = 10
+INITIAL_CAPACITY = 1024
+# How often the Tk loop checks for new iterations, and how long each one stays
+# on screen before the next is shown.
+POLL_MS = 50
+STEP_MS = 500
 
 
 class KMeansVisualizer:
@@ -12,14 +26,40 @@ class KMeansVisualizer:
         self.root.title("K-Means Clustering Visualizer")
         self.root.geometry("900x650")
 
-        self.points = np.empty((0, 2))
+        # Clicks append to a preallocated buffer that doubles when full;
+        # self.points is a view of its filled part.
+        self.buffer = np.empty((INITIAL_CAPACITY, 2))
+        self.count = 0
+        self.background = None
+        # Queue of the running K-Means job, None when idle.
+        self.job = None
         self.k = tk.IntVar(value=3)
         self.max_iter = tk.IntVar(value=10)
+        # Same seed, same points -> same run.
+        self.seed = tk.IntVar(value=0)
 
         self.setup_ui()
 
         # Connect mouse click event on matplotlib canvas
         self.cid = self.canvas.mpl_connect("button_press_event", self.on_click)
+        self.canvas.mpl_connect("draw_event", self.on_draw)
+
+    @property
+    def points(self):
+        return self.buffer[:self.count]
+
+    def set_points(self, points):
+        self.buffer = np.empty((max(INITIAL_CAPACITY, len(points)), 2))
+        self.buffer[:len(points)] = points
+        self.count = len(points)
+
+    def add_point(self, x, y):
+        if self.count == len(self.buffer):
+            grown = np.empty((2 * len(self.buffer), 2))
+            grown[:self.count] = self.points
+            self.buffer = grown
+        self.buffer[self.count] = x, y
+        self.count += 1
 
     def setup_ui(self):
         control_frame = ttk.Frame(self.root)
@@ -31,6 +71,9 @@ class KMeansVisualizer:
         ttk.Label(control_frame, text="Max Iterations:").pack(side=tk.LEFT)
         ttk.Entry(control_frame, textvariable=self.max_iter, width=5).pack(side=tk.LEFT, padx=5)
 
+        ttk.Label(control_frame, text="Seed:").pack(side=tk.LEFT)
+        ttk.Entry(control_frame, textvariable=self.seed, width=6).pack(side=tk.LEFT, padx=5)
+
         ttk.Button(control_frame, text="Generate Points", command=self.generate_points).pack(side=tk.LEFT, padx=10)
         ttk.Button(control_frame, text="Run K-Means", command=self.run_kmeans).pack(side=tk.LEFT)
         ttk.Button(control_frame, text="Clear", command=self.clear_canvas).pack(side=tk.LEFT, padx=5)
@@ -43,49 +86,74 @@ class KMeansVisualizer:
         self.canvas = FigureCanvasTkAgg(self.fig, master=self.root)
         self.canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
 
+        # Persistent artists: updates change their data in place and blit
+        # them over a cached background instead of redrawing the figure.
+        self.ax.set_xlim(0, EXTENT)
+        self.ax.set_ylim(0, EXTENT)
+        self.ax.set_title("K-Means Clustering")
+        self.scatter = self.ax.scatter(np.empty(0), np.empty(0), color='gray', animated=True)
+        self.centroid_marks = self.ax.scatter(np.empty(0), np.empty(0), color='black', marker='X', s=100,
+                                              animated=True)
+        self.status = self.ax.text(0.02, 0.98, "", transform=self.ax.transAxes, va='top', animated=True)
+        self.set_legend()
+
+    def set_legend(self, k=None):
+        """Rebuilds the legend for ``k`` clusters (plain points if None); needs a full redraw."""
+        if k is None:
+            handles = [Line2D([], [], ls='', marker='o', color='gray', label='Points')]
+        else:
+            handles = [Line2D([], [], ls='', marker='o', color=COLORS[i % len(COLORS)], label=f"Cluster {i}")
+                       for i in range(k)]
+            handles.append(Line2D([], [], ls='', marker='X', color='black', markersize=10, label='Centroids'))
+        self.ax.legend(handles=handles, loc='upper left', bbox_to_anchor=(1, 1))
+        self.fig.tight_layout()
+        self.background = None
+
+    def on_draw(self, event):
+        # A full draw skips the animated artists; cache what it drew under them.
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.draw_animated()
+
+    def draw_animated(self):
+        for artist in (self.scatter, self.centroid_marks, self.status):
+            self.ax.draw_artist(artist)
+
+    def blit(self):
+        if self.background is None:
+            self.canvas.draw()
+            return
+        self.canvas.restore_region(self.background)
+        self.draw_animated()
+        self.canvas.blit(self.ax.bbox)
+
     def generate_points(self, count=100):
-        self.points = np.array([[random.uniform(0, 10), random.uniform(0, 10)] for _ in range(count)])
+        self.cancel_run()
+        self.set_points(np.random.uniform(0, EXTENT, (count, 2)))
         self.plot_points()
 
-    def plot_points(self, clusters=None, centroids=None, iteration=None):
-        self.ax.clear()
-
-        if clusters is None:
-            self.ax.scatter(self.points[:, 0], self.points[:, 1], color='gray', label='Points')
+    def plot_points(self, labels=None, centroids=None, iteration=None):
+        self.scatter.set_offsets(self.points)
+        if labels is None:
+            self.scatter.set_facecolor('gray')
         else:
-            colors = ['red', 'green', 'blue', 'purple', 'orange', 'cyan', 'magenta']
-            for i, cluster in enumerate(clusters):
-                if len(cluster) > 0:
-                    cluster = np.array(cluster)
-                    self.ax.scatter(cluster[:, 0], cluster[:, 1], color=colors[i % len(colors)], label=f"Cluster {i}")
-            if centroids is not None:
-                centroids = np.array(centroids)
-                self.ax.scatter(centroids[:, 0], centroids[:, 1], color='black', marker='X', s=100, label='Centroids')
-
-        title = "K-Means Clustering"
-        if iteration is not None:
-            title += f" - Iteration {iteration + 1}"
-        self.ax.set_title(title)
-
-        handles, labels = self.ax.get_legend_handles_labels()
-        if labels:
-            self.ax.legend(loc='upper left', bbox_to_anchor=(1, 1))
-
-        self.fig.tight_layout()
-        self.canvas.draw()
+            self.scatter.set_facecolor(PALETTE[labels % len(PALETTE)])
+        self.centroid_marks.set_offsets(np.empty((0, 2)) if centroids is None else centroids)
+        self.status.set_text("" if iteration is None else f"Iteration {iteration + 1}")
+        self.blit()
 
     def clear_canvas(self):
-        self.points = np.empty((0, 2))
-        self.ax.clear()
-        self.canvas.draw()
+        self.cancel_run()
+        self.set_points(np.empty((0, 2)))
+        self.set_legend()
+        self.plot_points()
         self.progress["value"] = 0
 
     def on_click(self, event):
         # Only add point if click inside axes
         if event.inaxes != self.ax:
             return
-        x, y = event.xdata, event.ydata
-        self.points = np.append(self.points, [[x, y]], axis=0)
+        self.cancel_run()
+        self.add_point(event.xdata, event.ydata)
         self.plot_points()
 
     def run_kmeans(self):
@@ -104,35 +172,57 @@ class KMeansVisualizer:
             messagebox.showerror("Error", "Number of clusters cannot exceed number of points.")
             return
 
-        centroids = random.sample(self.points.tolist(), k)
-
+        self.cancel_run()
         self.progress["maximum"] = max_iter
         self.progress["value"] = 0
+        self.set_legend(k)
+
+        # The clustering runs on a worker thread and never touches Tk; poll()
+        # picks its iterations up from the queue on the Tk thread.
+        self.job = queue.Queue()
+        worker = threading.Thread(target=self.cluster,
+                                  args=(self.points.copy(), k, max_iter, self.seed.get(), self.job), daemon=True)
+        worker.start()
+        self.root.after(POLL_MS, self.poll, self.job)
+
+    def cancel_run(self):
+        # The worker notices on its next iteration and stops.
+        self.job = None
+        self.progress["value"] = 0
 
+    def cluster(self, points, k, max_iter, seed, results):
+        """Queues (iteration, labels, centroids) for each Lloyd step, then None."""
+        rng = np.random.default_rng(seed)
+        centroids = kmeans_plus_plus(points, k, rng)
+        threshold = shift_threshold(points)
         for iteration in range(max_iter):
-            self.progress["value"] = iteration + 1
-            self.root.update_idletasks()
-
-            clusters = [[] for _ in range(k)]
-
-            for point in self.points:
-                distances = [np.linalg.norm(point - centroid) for centroid in centroids]
-                cluster_index = distances.index(min(distances))
-                clusters[cluster_index].append(point)
-
-            new_centroids = []
-            for cluster in clusters:
-                if cluster:
-                    new_centroids.append(np.mean(cluster, axis=0))
-                else:
-                    new_centroids.append(random.choice(self.points))
-
+            if self.job is not results:
+                return
+            labels = assign(points, centroids)
+            new_centroids = reseed_empty(points, labels, update_centroids(points, labels, centroids))
+            results.put((iteration, labels, new_centroids))
+            done = converged(centroids, new_centroids, threshold)
             centroids = new_centroids
-            self.plot_points(clusters, centroids, iteration)
-            self.root.update()
-            self.root.after(500)  # animation speed; reduce delay if you want faster
+            if done:
+                break
+        results.put(None)
 
-        self.progress["value"] = 0  # Reset progress bar after done
+    def poll(self, results):
+        if self.job is not results:
+            return
+        try:
+            step = results.get_nowait()
+        except queue.Empty:
+            self.root.after(POLL_MS, self.poll, results)
+            return
+        if step is None:
+            self.job = None
+            self.progress["value"] = 0  # Reset progress bar after done
+            return
+        iteration, labels, centroids = step
+        self.progress["value"] = iteration + 1
+        self.plot_points(labels, centroids, iteration)
+        self.root.after(STEP_MS, self.poll, results)
 
 
 if __name__ == "__main__":
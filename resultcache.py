@@ -0,0 +1,152 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+import numpy as np
+
+
+def map_key(grid):
+    """Content hash of a grid: its size, packed wall bitmap and any terrain.
+
+    Hashing the bitmap rather than the request's wall list makes the key
+    independent of wall order and duplicates.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{grid.rows}x{grid.cols}:".encode())
+    digest.update(np.packbits(grid.walls).tobytes())
+    if grid.costs is not None:
+        digest.update(b"costs:" + grid.costs.tobytes())
+    if grid.diagonal:
+        digest.update(b"diagonal")
+    return digest.hexdigest()
+
+
+def search_key(grid, start, end, algorithm):
+    """Canonical key for a search: the map, the endpoints and the algorithm."""
+    return f"{algorithm}:{start}:{end}:{map_key(grid)}"
+
+
+class LRUCache:
+    """Thread-safe in-process LRU cache with an entry limit and a TTL in seconds."""
+
+    backend = "memory"
+
+    def __init__(self, max_entries=256, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._store(key, value)
+
+    def _store(self, key, value):
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def setdefault(self, key, value):
+        """Stores ``value`` unless ``key`` has a live entry; returns the value kept."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] <= self.ttl:
+                self._entries.move_to_end(key)
+                return entry[1]
+            self._store(key, value)
+            return value
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return {"backend": self.backend, "hits": self.hits, "misses": self.misses,
+                    "size": len(self._entries), "max_entries": self.max_entries, "ttl": self.ttl}
+
+
+class SqliteCache:
+    """LRU cache in a sqlite file, shared by every worker process that opens it.
+
+    Values are stored as JSON, or as blobs if they are bytes; hit/miss
+    counters live in the same file so the stats cover all workers.
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, path, max_entries=256, ttl=300):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        with self._connect() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS entries "
+                       "(key TEXT PRIMARY KEY, value TEXT, created REAL, used REAL)")
+            db.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER)")
+            db.execute("INSERT OR IGNORE INTO counters VALUES ('hits', 0), ('misses', 0)")
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=10)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def get(self, key):
+        now = time.time()
+        with self._connect() as db:
+            row = db.execute("SELECT value FROM entries WHERE key = ? AND created >= ?",
+                             (key, now - self.ttl)).fetchone()
+            counter = "hits" if row else "misses"
+            db.execute("UPDATE counters SET value = value + 1 WHERE name = ?", (counter,))
+            if row is None:
+                return None
+            db.execute("UPDATE entries SET used = ? WHERE key = ?", (now, key))
+        return row[0] if isinstance(row[0], bytes) else json.loads(row[0])
+
+    def set(self, key, value):
+        now = time.time()
+        with self._connect() as db:
+            db.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                       (key, value if isinstance(value, bytes) else json.dumps(value), now, now))
+            db.execute("DELETE FROM entries WHERE created < ?", (now - self.ttl,))
+            db.execute("DELETE FROM entries WHERE key NOT IN "
+                       "(SELECT key FROM entries ORDER BY used DESC LIMIT ?)", (self.max_entries,))
+
+    def delete(self, key):
+        with self._connect() as db:
+            db.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def stats(self):
+        with self._connect() as db:
+            counters = dict(db.execute("SELECT name, value FROM counters"))
+            size = db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return {"backend": self.backend, "hits": counters["hits"], "misses": counters["misses"],
+                "size": size, "max_entries": self.max_entries, "ttl": self.ttl}
+
+
+def make_cache(path=None, max_entries=256, ttl=300):
+    if path:
+        return SqliteCache(path, max_entries, ttl)
+    return LRUCache(max_entries, ttl)
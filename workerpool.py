@@ -0,0 +1,131 @@
+import multiprocessing
+import queue
+import random
+import threading
+import time
+
+
+class PoolSaturated(Exception):
+    """Every worker is busy and the wait queue is full."""
+
+
+class JobTimeout(Exception):
+    """A job ran past the pool's timeout; its worker was killed and replaced."""
+
+
+def _worker_main(conn):
+    # Forked workers inherit the parent's RNG state; give each its own.
+    random.seed()
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        fn, args, streaming = job
+        try:
+            if streaming:
+                # Items go back as (None, item) while the generator runs.
+                for item in fn(*args):
+                    conn.send((None, item))
+                conn.send((True, None))
+            else:
+                conn.send((True, fn(*args)))
+        except Exception as e:
+            conn.send((False, e))
+
+
+class WorkerPool:
+    """Fixed set of pre-started worker processes fed over pipes.
+
+    At most ``workers + max_queued`` jobs are admitted at once; beyond that
+    run() raises PoolSaturated instead of queueing. A job that exceeds
+    ``timeout`` seconds has its worker killed and respawned, so one bad input
+    can't pin a process. Workers are forked after the app has imported its
+    modules, so jobs pay no import cost.
+    """
+
+    def __init__(self, workers, max_queued, timeout):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.timeout = timeout
+        self._context = multiprocessing.get_context('fork')
+        self._slots = threading.BoundedSemaphore(workers + max_queued)
+        self._idle = queue.Queue()
+        for _ in range(workers):
+            self._idle.put(self._spawn())
+
+    def _spawn(self):
+        parent, child = self._context.Pipe()
+        process = self._context.Process(target=_worker_main, args=(child,), daemon=True)
+        process.start()
+        child.close()
+        return process, parent
+
+    def _replace(self, process, conn):
+        process.kill()
+        process.join()
+        conn.close()
+        return self._spawn()
+
+    def run(self, fn, *args):
+        """Runs fn(*args) in a worker and returns its result or re-raises its error."""
+        if not self._slots.acquire(blocking=False):
+            raise PoolSaturated()
+        try:
+            process, conn = self._idle.get()
+            try:
+                conn.send((fn, args, False))
+                if not conn.poll(self.timeout):
+                    process, conn = self._replace(process, conn)
+                    raise JobTimeout(f"Job exceeded {self.timeout} s")
+                ok, value = conn.recv()
+            except (EOFError, OSError):
+                process, conn = self._replace(process, conn)
+                raise RuntimeError("Worker process died")
+            finally:
+                self._idle.put((process, conn))
+        finally:
+            self._slots.release()
+        if not ok:
+            raise value
+        return value
+
+    def stream(self, fn, *args):
+        """Runs the generator function fn(*args) in a worker; iterates over what it yields.
+
+        Admission is decided here, so PoolSaturated is raised before anything
+        is read. ``timeout`` bounds the whole job, and the items are passed on
+        as the worker produces them. Closing the iterator early kills the
+        worker, since it may still be mid-job.
+        """
+        items = self._stream(fn, args)
+        next(items)
+        return items
+
+    def _stream(self, fn, args):
+        if not self._slots.acquire(blocking=False):
+            raise PoolSaturated()
+        process, conn = self._idle.get()
+        finished = False
+        try:
+            conn.send((fn, args, True))
+            deadline = time.monotonic() + self.timeout
+            yield
+            while True:
+                if not conn.poll(max(0.0, deadline - time.monotonic())):
+                    raise JobTimeout(f"Job exceeded {self.timeout} s")
+                ok, value = conn.recv()
+                if ok is None:
+                    yield value
+                    continue
+                finished = True
+                if not ok:
+                    raise value
+                return
+        except (EOFError, OSError):
+            raise RuntimeError("Worker process died")
+        finally:
+            if not finished:
+                process, conn = self._replace(process, conn)
+            self._idle.put((process, conn))
+            self._slots.release()